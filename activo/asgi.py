@@ -14,3 +14,7 @@ from channels.routing import get_default_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "activo.settings")
 django.setup()
 application = get_default_application()
+
+from .schema import prepare_schema  # noqa: E402
+
+prepare_schema()
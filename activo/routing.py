@@ -1,3 +1,15 @@
-from channels.routing import ProtocolTypeRouter
+from channels.routing import ProtocolTypeRouter, URLRouter
+from channels.security.websocket import AllowedHostsOriginValidator
 
-application = ProtocolTypeRouter({})
+from apps.users.consumers import TokenAuthMiddleware
+from apps.users.routing import websocket_urlpatterns
+from libs.asgi import ASGIHandler
+
+application = ProtocolTypeRouter(
+    {
+        "http": ASGIHandler(),
+        "websocket": AllowedHostsOriginValidator(
+            TokenAuthMiddleware(URLRouter(websocket_urlpatterns))
+        ),
+    }
+)
@@ -0,0 +1,79 @@
+import hashlib
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+from django.urls import get_script_prefix, set_script_prefix
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from rest_framework import permissions
+from rest_framework.views import APIView
+from drf_yasg import openapi
+from drf_yasg.codecs import OpenAPICodecJson
+from drf_yasg.generators import OpenAPISchemaGenerator
+from drf_yasg.views import get_schema_view
+
+info = openapi.Info(
+    title="Activo API",
+    default_version="v1",
+    description="Asset Management Sytem",
+)
+
+schema_view = get_schema_view(
+    info,
+    public=True,
+    permission_classes=(permissions.AllowAny,),
+)
+
+_schema = None
+
+
+def generate_schema():
+    """Introspect every view and serializer and encode the schema as JSON
+
+    Views are inspected with an anonymous GET request, and no host is
+    recorded so the docs UI targets the host serving the schema.
+    """
+
+    request = APIView().initialize_request(HttpRequest())
+    generator = OpenAPISchemaGenerator(info, url="")
+
+    # The prefix is only set while handling requests, it sets the base path
+    prefix = get_script_prefix()
+    set_script_prefix(settings.FORCE_SCRIPT_NAME or "/")
+    try:
+        schema = generator.get_schema(request=request, public=True)
+    finally:
+        set_script_prefix(prefix)
+
+    return OpenAPICodecJson(validators=[]).encode(schema)
+
+
+def load_schema():
+    """Return the schema and its ETag, generated once per process"""
+
+    global _schema
+    if _schema is None:
+        content = generate_schema()
+        _schema = content, quote_etag(hashlib.md5(content).hexdigest())
+
+    return _schema
+
+
+def prepare_schema():
+    """Generate the schema at startup so no request pays for it"""
+
+    if settings.PRECOMPUTED_SCHEMA:
+        load_schema()
+
+
+def schema_json(request):
+    """Serve the precomputed schema as a static asset"""
+
+    content, etag = load_schema()
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(content, content_type="application/json")
+
+    response["ETag"] = etag
+    patch_cache_control(response, public=True, max_age=settings.SCHEMA_CACHE_TIMEOUT)
+
+    return response
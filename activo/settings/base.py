@@ -23,6 +23,7 @@ DJANGO_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
 ]
 
 THIRD_PARTY_APPS = [
@@ -35,6 +36,8 @@ LOCAL_APPS = ["apps.users"]
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    "libs.timing.RequestTimingMiddleware",
+    "libs.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -67,6 +70,57 @@ FORCE_SCRIPT_NAME = "/api"
 WSGI_APPLICATION = "activo.wsgi.application"
 ASGI_APPLICATION = "activo.routing.application"
 
+# Under ASGI, the user list, detail and login views are served by async
+# variants running their blocking work in a pool of ASYNC_VIEW_THREADS
+# threads, see libs.asgi
+ASYNC_VIEWS = env.bool("ASYNC_VIEWS", default=False)
+ASYNC_VIEW_THREADS = env.int("ASYNC_VIEW_THREADS", default=32)
+
+
+# Per-request Server-Timing headers and structured logs, see libs.timing.
+# Requests slower than REQUEST_TIMING_SLOW_MS are logged as warnings, with
+# their SQL for a REQUEST_TIMING_SAMPLE_RATE share of requests
+REQUEST_TIMING = env.bool("REQUEST_TIMING", default=False)
+REQUEST_TIMING_SLOW_MS = env.int("REQUEST_TIMING_SLOW_MS", default=500)
+REQUEST_TIMING_SAMPLE_RATE = env.float("REQUEST_TIMING_SAMPLE_RATE", default=0.0)
+
+# Prometheus metrics served at /metrics to the bearer of METRICS_TOKEN, without
+# one they are only served with DEBUG.
+# Set PROMETHEUS_MULTIPROC_DIR to a directory shared by the web and worker
+# processes to aggregate their counters, see libs.metrics
+METRICS = env.bool("METRICS", default=True)
+METRICS_TOKEN = env("METRICS_TOKEN", default="")
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {"libs.timing": {"handlers": ["console"], "level": "INFO"}},
+}
+
+
+# Password hashers
+# The first hasher of the selected profile hashes new passwords, the others
+# only verify existing hashes, which are rehashed on the next successful login
+
+PASSWORD_HASHER_PROFILES = {
+    "pbkdf2": [
+        "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+        "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+        "apps.users.hashers.Argon2idPasswordHasher",
+        "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    ],
+    "argon2": [
+        "apps.users.hashers.Argon2idPasswordHasher",
+        "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+        "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+        "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    ],
+}
+PASSWORD_HASHERS = PASSWORD_HASHER_PROFILES[
+    env("PASSWORD_HASHER_PROFILE", default="pbkdf2")
+]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -110,6 +164,20 @@ STATIC_ROOT = os.path.join(BASE_DIR, "static")
 STATIC_URL = FORCE_SCRIPT_NAME + "/static/"
 MEDIA_URL = FORCE_SCRIPT_NAME + "/media/"
 
+# Uploads are named by content hash, so identical files are stored once and
+# can be cached forever; see libs.storage.ContentAddressedStorage
+DEFAULT_FILE_STORAGE = "libs.storage.ContentAddressedStorage"
+
+# Media served by libs.views.serve_media. MEDIA_SENDFILE, "x-accel-redirect"
+# or "x-sendfile", hands the file body off to the web server
+SERVE_MEDIA = env.bool("SERVE_MEDIA", default=True)
+MEDIA_SENDFILE = env("MEDIA_SENDFILE", default="")
+MEDIA_ACCEL_PREFIX = "/protected-media/"
+MEDIA_CACHE_TIMEOUT = 60 * 60
+
+# Square variants built by the worker for every uploaded profile picture
+PROFILE_PICTURE_SIZES = {"thumbnail": 64, "medium": 256}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
@@ -125,6 +193,40 @@ EMAIL_PORT = env("EMAIL_PORT")
 EMAIL_USE_TLS = True
 DEFAULT_FROM_EMAIL = env("DEFAULT_FROM_EMAIL")
 
+# Emails are queued in a Redis outbox and sent in batches by the worker over
+# one long-lived SMTP connection, see libs.mail
+MAIL_OUTBOX = env.bool("MAIL_OUTBOX", default=True)
+MAIL_QUEUE = "default"
+MAIL_BATCH_SIZE = 100
+MAIL_FLUSH_DELAY = 2
+MAIL_MAX_RETRIES = 3
+MAIL_RETRY_BACKOFF = 1
+
+# The worker emails provisioned users their initial password, turn it off
+# where no worker runs
+ACCOUNT_EMAILS = True
+
+# Shared by the web and worker processes, see libs.cache for namespaced,
+# versioned entries with hit-rate stats
+CACHES = {
+    "default": env.cache(
+        "CACHE_URL",
+        default=f"rediscache://{env('REDIS_HOST')}:{env('REDIS_PORT')}/1",
+    ),
+}
+
+# User changes are pushed to WebSocket clients through the channel layer and
+# logged for USER_EVENTS_RETENTION days, so reconnecting clients can catch up
+# on up to USER_EVENTS_BACKLOG missed events
+CHANNEL_LAYERS = {
+    "default": {
+        "BACKEND": "channels_redis.core.RedisChannelLayer",
+        "CONFIG": {"hosts": [(env("REDIS_HOST"), env.int("REDIS_PORT"))]},
+    },
+}
+USER_EVENTS_BACKLOG = 1000
+USER_EVENTS_RETENTION = 7
+
 RQ_QUEUES = {
     "default": {
         "HOST": env("REDIS_HOST"),
@@ -141,13 +243,27 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
+    "PAGE_SIZE": env.int("PAGE_SIZE", default=50),
 }
 
 SIMPLE_JWT = {"ACCESS_TOKEN_LIFETIME": datetime.timedelta(days=1)}
 
+# Seconds a user instance stays cached for views authenticated with
+# apps.users.authentication.StatelessJWTAuthentication
+STATELESS_AUTH_USER_TIMEOUT = 60
+USER_REPRESENTATION_TIMEOUT = 60 * 60 * 24
+
+# When enabled, the OpenAPI schema is generated once when the application
+# starts and the docs UI loads it as a static asset, instead of introspecting
+# every view on each request
+PRECOMPUTED_SCHEMA = env.bool("PRECOMPUTED_SCHEMA", default=True)
+SCHEMA_CACHE_TIMEOUT = 60 * 60
+
 SWAGGER_SETTINGS = {
     "SECURITY_DEFINITIONS": {
         "Bearer": {"type": "apiKey", "name": "Authorization", "in": "header"}
     },
     "LOGIN_URL": "/api/admin/login/",
+    "DEFAULT_INFO": "activo.schema.info",
+    "SPEC_URL": "schema-json" if PRECOMPUTED_SCHEMA else None,
 }
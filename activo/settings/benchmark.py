@@ -0,0 +1,28 @@
+from .base import *
+
+# Settings for `python manage.py benchmark_users`, which seeds and writes
+# users: point BENCHMARK_DATABASE_URL at a disposable database only
+
+BENCHMARK = True
+
+DEBUG = False
+
+ALLOWED_HOSTS = ["*"]
+
+DATABASES = {
+    "default": env.db(
+        "BENCHMARK_DATABASE_URL",
+        default=f"sqlite:///{BASE_DIR.parent / 'benchmark.sqlite3'}",
+    )
+}
+
+CACHES = {"default": env.cache("BENCHMARK_CACHE_URL", default="locmemcache://")}
+
+CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+
+EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+MAIL_OUTBOX = False
+ACCOUNT_EMAILS = False
+
+REQUEST_TIMING = False
+METRICS = False
@@ -1 +1,30 @@
 from .base import *
+
+DEBUG = False
+
+ALLOWED_HOSTS = env("ALLOWED_HOSTS").split(" ")
+
+# Served by an ASGI server, e.g. `daphne activo.asgi:application`
+ASYNC_VIEWS = env.bool("ASYNC_VIEWS", default=True)
+
+# Database
+# Connections persist for CONN_MAX_AGE seconds and are health checked before
+# being reused by a request. Set DB_POOLER when connecting through a
+# transaction-level pooler such as PgBouncer: queries are then never run on
+# server-side cursors, which do not survive the pooler switching servers.
+
+DB_POOLER = env.bool("DB_POOLER", default=False)
+
+DATABASES = {
+    "default": {
+        "ENGINE": "libs.db.postgresql",
+        "NAME": env("POSTGRES_DB"),
+        "USER": env("POSTGRES_USER"),
+        "PASSWORD": env("POSTGRES_PASSWORD"),
+        "HOST": env("POSTGRES_HOST"),
+        "PORT": env("POSTGRES_PORT"),
+        "CONN_MAX_AGE": env.int("CONN_MAX_AGE", default=600),
+        "CONN_HEALTH_CHECKS": True,
+        "DISABLE_SERVER_SIDE_CURSORS": DB_POOLER,
+    }
+}
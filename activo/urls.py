@@ -1,18 +1,11 @@
+from django.conf import settings
 from django.contrib import admin
-from django.urls import path, include
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
+from django.urls import path, re_path, include
+from django.views.decorators.http import require_safe
 
-schema_view = get_schema_view(
-    openapi.Info(
-        title="Activo API",
-        default_version="v1",
-        description="Asset Management Sytem",
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-)
+from libs.metrics import metrics
+from libs.views import serve_media
+from .schema import schema_view, schema_json
 
 urlpatterns = [
     path("", schema_view.with_ui("swagger", cache_timeout=0), name="swagger-doc"),
@@ -21,6 +14,17 @@ urlpatterns = [
     path("users/", include("apps.users.urls")),
 ]
 
+if settings.PRECOMPUTED_SCHEMA:
+    urlpatterns.append(
+        path("openapi.json", require_safe(schema_json), name="schema-json")
+    )
+
+if settings.METRICS:
+    urlpatterns.append(path("metrics", require_safe(metrics), name="metrics"))
+
+if settings.SERVE_MEDIA:
+    urlpatterns.append(re_path(r"^media/(?P<path>.+)$", require_safe(serve_media)))
+
 admin.site.site_header = "Activo API"
 admin.site.site_title = "Activo API Admin Portal"
 admin.site.index_title = "Welcome to Activo Portal"
@@ -5,3 +5,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "activo.settings")
 
 application = get_wsgi_application()
+
+from .schema import prepare_schema  # noqa: E402
+
+prepare_schema()
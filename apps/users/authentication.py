@@ -0,0 +1,184 @@
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import transaction
+from django.utils.crypto import salted_hmac
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.settings import api_settings as rest_settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from libs.cache import CacheNamespace
+from .models import User
+from .permissions import get_permissions_version, load_permissions
+
+AUTH_VERSION_CLAIM = "auth_version"
+AUTH_VERSION_TIMEOUT = 60 * 60
+
+auth_versions_cache = CacheNamespace("users:auth", timeout=AUTH_VERSION_TIMEOUT)
+users_cache = CacheNamespace("users:instance")
+
+
+def get_token_permissions(user):
+    """Return the permissions embedded in the user's access tokens"""
+
+    if user.is_superuser:
+        return []
+
+    load_permissions(user)
+    return sorted(user.get_all_permissions())
+
+
+def get_auth_version(user):
+    """Digest of everything a stateless token trusts about the user
+
+    It changes whenever the password, the active or superuser flags or the
+    permissions change, which revokes every token issued before.
+    """
+
+    value = "{}:{}:{}:{}".format(
+        user.password,
+        user.is_active,
+        user.is_superuser,
+        ",".join(get_token_permissions(user)),
+    )
+    return salted_hmac(__name__, value).hexdigest()[:16]
+
+
+def invalidate_auth_versions(*user_ids):
+    """Drop the cached auth versions and instances of the given users
+
+    They are dropped again once the transaction commits, as requests
+    reading the users before then cache the rows being replaced.
+    """
+
+    def delete():
+        version = get_permissions_version()
+        auth_versions_cache.delete_many([(version, user_id) for user_id in user_ids])
+        users_cache.delete_many(user_ids)
+
+    delete()
+    transaction.on_commit(delete)
+
+
+def get_current_auth_version(user_id):
+    # Keyed by the permissions version, so permission changes revoke tokens
+    return auth_versions_cache.get_or_set(
+        (get_permissions_version(), user_id),
+        lambda: get_auth_version(get_cached_user(user_id)),
+    )
+
+
+def load_user(user_id):
+    user = User.objects.filter(pk=user_id).first()
+    if user is None:
+        raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+    return user
+
+
+def get_cached_user(user_id):
+    """Return the user model instance through a short-lived cache"""
+
+    return users_cache.get_or_set(
+        user_id,
+        lambda: load_user(user_id),
+        settings.STATELESS_AUTH_USER_TIMEOUT,
+    )
+
+
+def add_token_claims(token, user):
+    token["is_active"] = user.is_active
+    token["is_staff"] = user.is_staff
+    token["is_superuser"] = user.is_superuser
+    token["permissions"] = get_token_permissions(user)
+    token[AUTH_VERSION_CLAIM] = get_auth_version(user)
+
+    return token
+
+
+class StatelessUser(TokenUser):
+    """Request user backed by the claims of a validated access token
+
+    Attributes not carried by the token, such as `email`, are read from the
+    cached user model instance, which is only loaded when first needed.
+    """
+
+    @cached_property
+    def is_active(self):
+        return self.token.get("is_active", False)
+
+    @cached_property
+    def permissions(self):
+        return set(self.token.get("permissions", []))
+
+    @cached_property
+    def instance(self):
+        return get_cached_user(self.id)
+
+    def __getattr__(self, name):
+        if name.startswith("_") or name == "token":
+            raise AttributeError(name)
+
+        return getattr(self.instance, name)
+
+    def get_all_permissions(self, obj=None):
+        return set(self.permissions) if obj is None else set()
+
+    def has_perm(self, perm, obj=None):
+        if not self.is_active:
+            return False
+
+        return self.is_superuser or perm in self.get_all_permissions(obj)
+
+    def has_perms(self, perm_list, obj=None):
+        return all(self.has_perm(perm, obj) for perm in perm_list)
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """JWT authentication trusting the access token claims
+
+    Instead of loading the user on every request, the token's auth version
+    is compared with the cached current one.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+            version = validated_token[AUTH_VERSION_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        if not validated_token.get("is_active", False):
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if version != get_current_auth_version(user_id):
+            raise AuthenticationFailed(
+                _("Token is no longer valid"), code="token_not_valid"
+            )
+
+        return StatelessUser(validated_token)
+
+
+def get_token_user(raw_token):
+    """Return the user of an access token, or an anonymous user
+
+    The token is checked by the first JWT authentication class configured
+    for the API, for clients such as WebSockets that cannot send headers.
+    """
+
+    for authentication_class in rest_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        if issubclass(authentication_class, JWTAuthentication):
+            authentication = authentication_class()
+            break
+    else:
+        authentication = JWTAuthentication()
+
+    try:
+        validated_token = authentication.get_validated_token(raw_token)
+        return authentication.get_user(validated_token)
+    except (InvalidToken, AuthenticationFailed):
+        return AnonymousUser()
@@ -0,0 +1,103 @@
+import io
+from urllib.parse import parse_qs
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from channels.middleware import BaseMiddleware
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+
+from .authentication import get_token_user
+from .events import USER_EVENTS_GROUP, get_events_since
+from .models import User, UserEvent
+from .representations import REPRESENTATION_FIELDS, get_representations
+
+
+def get_query_params(scope):
+    query_string = scope.get("query_string", b"").decode("latin1")
+    return {key: values[-1] for key, values in parse_qs(query_string).items()}
+
+
+class TokenAuthMiddleware(BaseMiddleware):
+    """Set the scope's user from the `token` query parameter"""
+
+    async def __call__(self, scope, receive, send):
+        token = get_query_params(scope).get("token", "")
+        user = await database_sync_to_async(get_token_user)(token)
+
+        return await super().__call__(dict(scope, user=user), receive, send)
+
+
+def get_request(scope):
+    """HTTP request matching a WebSocket handshake, to render absolute URLs"""
+
+    scheme = "https" if scope.get("scheme") == "wss" else "http"
+    return ASGIRequest(dict(scope, method="GET", scheme=scheme), io.BytesIO())
+
+
+class UserEventsConsumer(AsyncJsonWebsocketConsumer):
+    """Push user created, updated and deleted events
+
+    Clients connect with `?token=<access token>` and may pass
+    `since=<sequence>`, the last sequence they received, to first be sent
+    the events they missed. A `reset` message means those can no longer be
+    replayed and the users should be reloaded.
+    """
+
+    permission = "users.view_user"
+
+    async def connect(self):
+        user = self.scope.get("user")
+        if not user or not await database_sync_to_async(user.has_perm)(self.permission):
+            await self.close()
+            return
+
+        await self.accept()
+        self.request = get_request(self.scope)
+        self.replayed = set()
+
+        # Join before reading the log so no event falls in between
+        self.groups = [USER_EVENTS_GROUP]
+        await self.channel_layer.group_add(USER_EVENTS_GROUP, self.channel_name)
+
+        try:
+            since = int(get_query_params(self.scope)["since"])
+        except (KeyError, ValueError):
+            return
+
+        events = await database_sync_to_async(get_events_since)(
+            since, settings.USER_EVENTS_BACKLOG
+        )
+        if events is None:
+            await self.send_json({"type": "reset"})
+        else:
+            self.replayed = {event["sequence"] for event in events}
+            await self.send_events(events)
+
+    async def user_events(self, message):
+        events = [
+            event
+            for event in message["events"]
+            if event["sequence"] not in self.replayed
+        ]
+        await self.send_events(events)
+
+    async def send_events(self, events):
+        for payload in await database_sync_to_async(self.render_events)(events):
+            await self.send_json(payload)
+
+    def render_events(self, events):
+        """Attach the current representation of each created or updated user"""
+
+        ids = {
+            event["user_id"] for event in events if event["action"] != UserEvent.DELETED
+        }
+        users = User.objects.only(*REPRESENTATION_FIELDS).filter(pk__in=ids)
+        representations = {
+            representation["id"]: representation
+            for representation in get_representations(list(users), self.request)
+        }
+
+        return [
+            {"type": "event", **event, "user": representations.get(event["user_id"])}
+            for event in events
+        ]
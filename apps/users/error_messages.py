@@ -12,23 +12,38 @@ errors = {
         "invalid": "The provided email is invalid",
         "blank": "Email address can't be blank",
         "unique": "The provided email already exists",
+        "duplicate": "The provided email is repeated in the request",
     },
     "phone_number": {
         "required": "Phone number is required",
         "blank": "Phone number can't be blank",
         "invalid": "The provided phone number is invalid",
         "unique": "The provided phone number already exists",
+        "duplicate": "The provided phone number is repeated in the request",
     },
     "id_number": {
         "required": "ID number is required",
         "blank": "ID number can't be blank",
         "invalid": "The provided ID number is invalid",
         "unique": "The provided ID number already exists",
+        "duplicate": "The provided ID number is repeated in the request",
     },
     "password": {
         "required": "Password is required",
         "blank": "Password field can't be blank",
         "min_length": "Password must have at least 8 characters",
         "weak": "Password must contain at least 1 uppercase, 1 lowercase and 1 special character",
+        "hash": "The provided password is not a known password hash",
+    },
+    "groups": {
+        "does_not_exist": 'Invalid pk "{pk}" - object does not exist.',
+        "invalid": "Groups must be a list of ids",
+    },
+    "users": {
+        "not_a_list": "Expected a list of users or a CSV file",
+        "max_rows": "A bulk request can't have more than {max_rows} users",
+    },
+    "export": {
+        "file_type": "File type must be one of: {choices}",
     },
 }
@@ -0,0 +1,104 @@
+import logging
+import zlib
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import connection, transaction
+
+from .models import UserEvent
+
+USER_EVENTS_GROUP = "users.events"
+BROADCAST_BATCH_SIZE = 500
+EVENTS_LOCK_ID = zlib.crc32(USER_EVENTS_GROUP.encode())
+
+logger = logging.getLogger(__name__)
+
+
+def serialize_event(event):
+    return {"sequence": event.pk, "action": event.action, "user_id": event.user_id}
+
+
+def record_events(action, user_ids):
+    """Log changes to users and broadcast them once the transaction commits
+
+    The log is written in the same transaction as the change, so an event is
+    only ever sent for a committed change and reconnecting clients can read
+    the ones they missed.
+    """
+
+    events = [UserEvent(user_id=user_id, action=action) for user_id in user_ids]
+    if not events:
+        return
+
+    with transaction.atomic():
+        lock_events()
+        if connection.features.can_return_rows_from_bulk_insert:
+            UserEvent.objects.bulk_create(events)
+        else:
+            for event in events:
+                event.save()
+
+        transaction.on_commit(lambda: broadcast(events))
+
+
+def lock_events():
+    """Make event sequences become visible in the order they are assigned
+
+    Ids are handed out on insert, not on commit, so a long transaction could
+    otherwise commit a lower sequence after clients resumed past a higher
+    one. On PostgreSQL, transactions logging events hold an advisory lock
+    from their first event until they end, SQLite already runs one write
+    transaction at a time.
+    """
+
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", [EVENTS_LOCK_ID])
+
+
+def broadcast(events):
+    """Send events to the connected clients through the channel layer
+
+    A channel layer outage only loses the live push, clients still find the
+    events in the log when they reconnect.
+    """
+
+    layer = get_channel_layer()
+    if layer is None:
+        return
+
+    for start in range(0, len(events), BROADCAST_BATCH_SIZE):
+        end = start + BROADCAST_BATCH_SIZE
+        batch = events[start:end]
+        message = {
+            "type": "user.events",
+            "events": [serialize_event(event) for event in batch],
+        }
+        try:
+            async_to_sync(layer.group_send)(USER_EVENTS_GROUP, message)
+        except Exception:
+            logger.exception("Could not broadcast %s user events", len(batch))
+
+
+def get_events_since(sequence, limit):
+    """Return the events after `sequence`, oldest first
+
+    Returns None when more than `limit` events were missed or when the
+    missed ones were already pruned; the client should then reload.
+    """
+
+    oldest = UserEvent.objects.order_by("pk").values_list("pk", flat=True).first()
+    if oldest is not None and sequence < oldest - 1:
+        return None
+
+    events = list(UserEvent.objects.filter(pk__gt=sequence).order_by("pk")[: limit + 1])
+    if len(events) > limit:
+        return None
+
+    return [serialize_event(event) for event in events]
+
+
+def prune_events(before):
+    """Delete the events older than `before`, returns how many were deleted"""
+
+    deleted, _ = UserEvent.objects.filter(created_at__lt=before).delete()
+    return deleted
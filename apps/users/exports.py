@@ -0,0 +1,74 @@
+from itertools import islice
+from django.db import connections
+
+from libs.pagination import KeysetPagination
+from .models import User
+
+EXPORT_FIELDS = [
+    "id",
+    "first_name",
+    "last_name",
+    "email",
+    "phone_number",
+    "id_number",
+    "is_active",
+    "is_staff",
+    "is_superuser",
+    "groups",
+    "created_at",
+    "updated_at",
+]
+
+
+def iterate_rows(queryset, ordering, chunk_size):
+    """Iterate over a large queryset without loading it at once
+
+    Server-side cursors are used when available. Behind a transaction
+    pooler they are disabled, so the rows are read in keyset pages instead.
+    """
+
+    queryset = queryset.order_by(*ordering)
+    if not connections[queryset.db].settings_dict.get("DISABLE_SERVER_SIDE_CURSORS"):
+        yield from queryset.iterator(chunk_size=chunk_size)
+        return
+
+    fields = [field.lstrip("-") for field in ordering]
+    page = queryset
+    while True:
+        rows = list(page[:chunk_size])
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+
+        position = [rows[-1][field] for field in fields]
+        page = KeysetPagination().seek(queryset, ordering, position)
+
+
+def export_chunks(queryset, ordering, chunk_size):
+    """Yield lists of user rows read through a server-side cursor
+
+    Rows are plain dicts and group ids are loaded with one query per chunk,
+    so memory use depends on `chunk_size` only.
+    """
+
+    columns = [field for field in EXPORT_FIELDS if field != "groups"]
+    columns += [
+        field.lstrip("-") for field in ordering if field.lstrip("-") not in columns
+    ]
+    rows = iterate_rows(queryset.values(*columns), ordering, chunk_size)
+
+    Membership = User.groups.through
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+
+        groups = {row["id"]: [] for row in chunk}
+        memberships = Membership.objects.filter(user_id__in=groups).order_by("group_id")
+        for user_id, group_id in memberships.values_list("user_id", "group_id"):
+            groups[user_id].append(group_id)
+
+        for row in chunk:
+            row["groups"] = groups[row["id"]]
+
+        yield chunk
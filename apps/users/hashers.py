@@ -0,0 +1,14 @@
+from django.contrib.auth.hashers import Argon2PasswordHasher
+
+
+class Argon2idPasswordHasher(Argon2PasswordHasher):
+    """Argon2id using a single lane and 19 MiB of memory
+
+    This is OWASP's minimum recommended configuration: it stays memory-hard
+    while costing a fraction of the CPU of 260k PBKDF2 iterations on one core.
+    Hashes created with other parameters are upgraded on the next login.
+    """
+
+    time_cost = 2
+    memory_cost = 19456
+    parallelism = 1
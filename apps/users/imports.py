@@ -0,0 +1,239 @@
+import csv
+import io
+import re
+from functools import partial
+from itertools import islice
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.contrib.auth.models import Group
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import connection, transaction
+
+from libs.utils.helpers import find_taken_values
+from .error_messages import errors
+from .events import record_events
+from .models import User, UserEvent, generate_password
+from .provisioning import UNIQUE_FIELDS, enqueue_activation, normalize_row
+from .serializers import PHONE_NUMBER_REGEX
+
+IMPORT_BATCH_SIZE = 5000
+LOOKUP_BATCH_SIZE = 500
+TEXT_FIELDS = ["first_name", "last_name", "email", "phone_number", "id_number"]
+USER_FIELDS = TEXT_FIELDS + ["password", "should_set_password"]
+STAGING_FIELDS = USER_FIELDS + ["groups"]
+
+Membership = User.groups.through
+
+CREATE_STAGING_SQL = """
+CREATE TEMPORARY TABLE IF NOT EXISTS users_import (
+    first_name varchar(100),
+    last_name varchar(100),
+    email varchar(250),
+    phone_number varchar(50),
+    id_number varchar(50),
+    password varchar(128),
+    should_set_password boolean,
+    groups bigint[]
+)
+"""
+
+COPY_SQL = (
+    f"COPY users_import ({', '.join(STAGING_FIELDS)}) FROM STDIN WITH (FORMAT csv)"
+)
+
+# Rows clashing with a stored email, phone or ID number are left out by
+# ON CONFLICT, the memberships of the inserted ones are added alongside
+INSERT_SQL = f"""
+WITH inserted AS (
+    INSERT INTO {User._meta.db_table} (
+        {', '.join(USER_FIELDS)}, profile_picture, profile_picture_variants,
+        is_admin, is_staff, is_active, is_superuser,
+        last_login, created_at, updated_at
+    )
+    SELECT {', '.join(USER_FIELDS)}, '', '{{}}',
+        false, false, true, false,
+        now(), now(), now()
+    FROM users_import
+    ON CONFLICT DO NOTHING
+    RETURNING id, email
+), memberships AS (
+    INSERT INTO {Membership._meta.db_table} (user_id, group_id)
+    SELECT inserted.id, unnest(users_import.groups)
+    FROM inserted JOIN users_import USING (email)
+)
+SELECT email, id FROM inserted
+"""
+
+
+def get_text(row, field):
+    value = row.get(field)
+    if value is None:
+        return None
+
+    return str(value).strip() or None
+
+
+def clean_row(row, group_ids):
+    """Model values of an imported row and the errors rejecting it, if any
+
+    A `password` cell must hold a hash made by one of PASSWORD_HASHERS, so
+    importing never runs a password hasher. Without one, the password is
+    left unusable and the user has to set it.
+    """
+
+    row = normalize_row(row)
+    values = {field: get_text(row, field) for field in TEXT_FIELDS}
+    row_errors = {}
+
+    if values["email"] is None:
+        row_errors["email"] = [errors["email"]["required"]]
+    else:
+        values["email"] = User.objects.normalize_email(values["email"]).lower()
+        try:
+            validate_email(values["email"])
+        except ValidationError:
+            row_errors["email"] = [errors["email"]["invalid"]]
+
+    phone_number = values["phone_number"]
+    if phone_number is not None and not re.match(PHONE_NUMBER_REGEX, phone_number):
+        row_errors["phone_number"] = [errors["phone_number"]["invalid"]]
+
+    password = get_text(row, "password")
+    if password is None:
+        values["password"] = make_password(None)
+        values["should_set_password"] = True
+    else:
+        try:
+            identify_hasher(password)
+        except ValueError:
+            row_errors["password"] = [errors["password"]["hash"]]
+        values["password"] = password
+        values["should_set_password"] = False
+
+    try:
+        values["groups"] = sorted({int(group) for group in row.get("groups") or []})
+    except (TypeError, ValueError):
+        row_errors["groups"] = [errors["groups"]["invalid"]]
+    else:
+        missing = [group for group in values["groups"] if group not in group_ids]
+        if missing:
+            row_errors["groups"] = [
+                errors["groups"]["does_not_exist"].format(pk=group) for group in missing
+            ]
+
+    return values, row_errors
+
+
+def format_copy_value(value):
+    if isinstance(value, list):
+        return "{" + ",".join(str(item) for item in value) + "}"
+
+    return value
+
+
+def copy_users(users):
+    """Insert users through COPY into a staging table and one INSERT"""
+
+    stream = io.StringIO()
+    writer = csv.writer(stream)
+    for values in users:
+        writer.writerow([format_copy_value(values[field]) for field in STAGING_FIELDS])
+    stream.seek(0)
+
+    with connection.cursor() as cursor:
+        cursor.execute(CREATE_STAGING_SQL)
+        cursor.execute("TRUNCATE users_import")
+        cursor.copy_expert(COPY_SQL, stream)
+        cursor.execute(INSERT_SQL)
+        return dict(cursor.fetchall())
+
+
+def create_users(users):
+    """Insert users with bulk_create, leaving out those clashing with stored ones"""
+
+    taken = find_taken_values(User, users, UNIQUE_FIELDS)
+    users = [
+        values
+        for values in users
+        if not any(values[field] in taken[field] for field in UNIQUE_FIELDS)
+    ]
+    User.objects.bulk_create(
+        [
+            User(**{field: values[field] for field in USER_FIELDS}, is_active=True)
+            for values in users
+        ],
+        batch_size=LOOKUP_BATCH_SIZE,
+    )
+
+    ids = {}
+    for start in range(0, len(users), LOOKUP_BATCH_SIZE):
+        end = start + LOOKUP_BATCH_SIZE
+        emails = [values["email"] for values in users[start:end]]
+        ids.update(User.objects.filter(email__in=emails).values_list("email", "id"))
+
+    Membership.objects.bulk_create(
+        [
+            Membership(user_id=ids[values["email"]], group_id=group)
+            for values in users
+            for group in values["groups"]
+        ],
+        batch_size=LOOKUP_BATCH_SIZE,
+    )
+
+    return ids
+
+
+def import_users(rows, batch_size=IMPORT_BATCH_SIZE, activate=False, progress=None):
+    """Create users from an iterable of rows, one transaction per batch
+
+    PostgreSQL loads each batch with COPY, other databases with
+    bulk_create. Rows whose email, phone or ID number is already stored,
+    or repeated in the batch, are skipped. With `activate`, users without
+    a password hash get a generated one emailed by the worker, like
+    provisioned users. Returns the counts and the errors of the rejected
+    rows, keyed by row number.
+    """
+
+    insert = copy_users if connection.vendor == "postgresql" else create_users
+    group_ids = set(Group.objects.values_list("id", flat=True))
+    counts = {"rows": 0, "created": 0, "skipped": 0, "failed": 0}
+    failed = {}
+
+    numbered = enumerate(rows, start=1)
+    while True:
+        chunk = list(islice(numbered, batch_size))
+        if not chunk:
+            return counts, failed
+
+        users = []
+        seen = {field: set() for field in UNIQUE_FIELDS}
+        for number, row in chunk:
+            values, row_errors = clean_row(row, group_ids)
+            if row_errors:
+                failed[number] = row_errors
+            elif any(values[field] in seen[field] for field in UNIQUE_FIELDS):
+                counts["skipped"] += 1
+            else:
+                users.append(values)
+                for field in UNIQUE_FIELDS:
+                    if values[field] is not None:
+                        seen[field].add(values[field])
+
+        with transaction.atomic():
+            ids = insert(users) if users else {}
+            record_events(UserEvent.CREATED, list(ids.values()))
+
+            if activate:
+                credentials = [
+                    (ids[values["email"]], generate_password())
+                    for values in users
+                    if values["email"] in ids and values["should_set_password"]
+                ]
+                transaction.on_commit(partial(enqueue_activation, credentials))
+
+        counts["rows"] += len(chunk)
+        counts["created"] += len(ids)
+        counts["skipped"] += len(users) - len(ids)
+        counts["failed"] = len(failed)
+        if progress is not None:
+            progress(counts)
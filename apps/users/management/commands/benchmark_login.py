@@ -0,0 +1,58 @@
+import json
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from ...models import User
+
+PASSWORD = "Benchmark-Password1"
+
+
+class Command(BaseCommand):
+    help = "Measure single-core logins per second for each password hasher profile"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=50)
+
+    def handle(self, *args, **options):
+        if not getattr(settings, "BENCHMARK", False):
+            raise CommandError(
+                "Run with DJANGO_SETTINGS_MODULE=activo.settings.benchmark, "
+                "the benchmark writes a user"
+            )
+
+        for profile, hashers in settings.PASSWORD_HASHER_PROFILES.items():
+            with override_settings(PASSWORD_HASHERS=hashers):
+                for path in ["/users/login/", "/users/login/?include=user"]:
+                    rate = self.measure(path, options["requests"])
+                    self.stdout.write(f"{profile:<8} {path:<28} {rate:8.1f} logins/s")
+
+    def measure(self, path, requests):
+        client = APIClient()
+        data = json.dumps({"email": "benchmark@app.com", "password": PASSWORD})
+
+        with transaction.atomic():
+            user = User(
+                email="benchmark@app.com",
+                first_name="Benchmark",
+                last_name="User",
+                phone_number="0780000000",
+                id_number="1199980000000000",
+                is_active=True,
+            )
+            user.set_password(PASSWORD)
+            user.save()
+
+            started = time.perf_counter()
+            for _ in range(requests):
+                response = client.post(path, data=data, content_type="application/json")
+                if response.status_code != 200:
+                    raise CommandError(f"POST {path}: {response.status_code}")
+            elapsed = time.perf_counter() - started
+
+            transaction.set_rollback(True)
+
+        return requests / elapsed
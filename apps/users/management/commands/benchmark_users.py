@@ -0,0 +1,159 @@
+import itertools
+import json
+import os
+import random
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from libs.benchmarks import find_regressions, measure
+from ...imports import import_users
+from ...models import User
+
+PASSWORD = "Benchmark-Password1"
+EMAIL_DOMAIN = "benchmark.test"
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+
+def seeded_users():
+    return User.objects.filter(email__startswith="user", email__endswith=EMAIL_DOMAIN)
+
+
+def parse_size(value):
+    try:
+        return SIZES.get(value.lower()) or int(value)
+    except ValueError:
+        raise CommandError(f"Invalid size {value}, use 10k, 100k, 1m or a number")
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a disposable database with users and measure the latency, "
+        "throughput and memory of the user endpoints"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size", default="10k", help="10k, 100k, 1m or a number")
+        parser.add_argument("--groups", type=int, default=20)
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument(
+            "--output", help="Results file, defaults to benchmarks/users-<size>.json"
+        )
+        parser.add_argument("--baseline", help="Results file to compare against")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="Fail when a metric is this much worse than the baseline",
+        )
+
+    def handle(self, *args, **options):
+        if not getattr(settings, "BENCHMARK", False):
+            raise CommandError(
+                "Run with DJANGO_SETTINGS_MODULE=activo.settings.benchmark, "
+                "the benchmark seeds and writes users"
+            )
+
+        size = parse_size(options["size"])
+        groups = self.seed(size, options["groups"])
+
+        endpoints = {}
+        for name, call in self.get_calls(size, groups).items():
+            endpoints[name] = measure(call, options["requests"])
+            self.stdout.write(
+                "{:<8} p50 {p50_ms:>9.2f}ms  p95 {p95_ms:>9.2f}ms  "
+                "p99 {p99_ms:>9.2f}ms  {throughput:>8.1f} req/s  "
+                "peak {peak_memory_kb:>9.1f}KB".format(name, **endpoints[name])
+            )
+
+        results = {"size": size, "vendor": connection.vendor, "endpoints": endpoints}
+        output = options["output"] or os.path.join(
+            "benchmarks", f"users-{options['size'].lower()}.json"
+        )
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+        with open(output, "w") as results_file:
+            json.dump(results, results_file, indent=2)
+        self.stdout.write(f"Results written to {output}")
+
+        if options["baseline"]:
+            with open(options["baseline"]) as baseline_file:
+                baseline = json.load(baseline_file)
+
+            regressions = find_regressions(
+                endpoints, baseline["endpoints"], options["threshold"]
+            )
+            if regressions:
+                raise CommandError("Regressions:\n" + "\n".join(regressions))
+            self.stdout.write("No regressions")
+
+    def seed(self, size, group_count):
+        """Add benchmark users, each in one group, until there are `size`"""
+
+        groups = [
+            Group.objects.get_or_create(name=f"benchmark-{index}")[0]
+            for index in range(group_count)
+        ]
+        existing = seeded_users().count()
+        password = make_password(PASSWORD)
+        rows = (
+            {
+                "email": f"user{number}@{EMAIL_DOMAIN}",
+                "first_name": f"First{number}",
+                "last_name": f"Last{number}",
+                "phone_number": f"+2507{number:08d}",
+                "id_number": f"{number:016d}",
+                "password": password,
+                "groups": [groups[number % len(groups)].pk],
+            }
+            for number in range(existing, size)
+        )
+        import_users(rows, progress=self.report_seeding)
+
+        return groups
+
+    def report_seeding(self, counts):
+        self.stdout.write(f"Seeded {counts['created']} users")
+
+    def get_admin(self):
+        admin = User.objects.filter(email=f"admin@{EMAIL_DOMAIN}").first()
+        if admin is None:
+            admin = User.objects.create_superuser(f"admin@{EMAIL_DOMAIN}", PASSWORD)
+
+        return admin
+
+    def get_calls(self, size, groups):
+        client = APIClient()
+        token = RefreshToken.for_user(self.get_admin()).access_token
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        ids = list(seeded_users().values_list("pk", flat=True)[:10000])
+        numbers = itertools.count(random.randrange(10 ** 9))
+        login = {"email": f"user{size - 1}@{EMAIL_DOMAIN}", "password": PASSWORD}
+
+        def call(method, path, status, **kwargs):
+            response = getattr(client, method)(path, format="json", **kwargs)
+            if response.status_code != status:
+                raise CommandError(f"{method.upper()} {path}: {response.status_code}")
+
+        def create():
+            number = next(numbers)
+            data = {
+                "first_name": "Created",
+                "last_name": "User",
+                "email": f"created{number}@{EMAIL_DOMAIN}",
+                "phone_number": f"+2508{number:010d}",
+                "id_number": f"9{number:015d}",
+                "groups": [random.choice(groups).pk],
+            }
+            call("post", "/users/", 201, data=data)
+
+        return {
+            "list": lambda: call("get", "/users/", 200),
+            "detail": lambda: call("get", f"/users/{random.choice(ids)}/", 200),
+            "create": create,
+            "login": lambda: call("post", "/users/login/", 200, data=login),
+        }
@@ -0,0 +1,42 @@
+import json
+from django.core.management.base import BaseCommand
+
+from libs.parsers import read_csv
+from ...imports import IMPORT_BATCH_SIZE, import_users
+
+
+class Command(BaseCommand):
+    help = (
+        "Create users from a CSV file with the columns first_name, last_name, "
+        "email, phone_number, id_number, password and groups. Passwords must "
+        "be hashes, users without one have to set theirs"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV file to import")
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument("--encoding", help="Defaults to DEFAULT_CHARSET")
+        parser.add_argument(
+            "--activate",
+            action="store_true",
+            help="Email a generated password to the users imported without one",
+        )
+
+    def handle(self, *args, **options):
+        with open(options["path"], "rb") as csv_file:
+            counts, failed = import_users(
+                read_csv(csv_file, options["encoding"]),
+                batch_size=options["batch_size"],
+                activate=options["activate"],
+                progress=self.report,
+            )
+
+        for number, row_errors in failed.items():
+            self.stderr.write(f"Row {number}: {json.dumps(row_errors)}")
+        self.report(counts)
+
+    def report(self, counts):
+        self.stdout.write(
+            "{rows} rows: {created} created, {skipped} skipped, "
+            "{failed} failed".format(**counts)
+        )
@@ -0,0 +1,50 @@
+import os
+import time
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from libs.storage import ContentAddressedStorage
+from ...models import User
+
+
+class Command(BaseCommand):
+    help = "Delete profile pictures and variants no user references any more"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--min-age",
+            type=int,
+            default=60 * 60,
+            help="Keep files younger than this many seconds, they may be in flight",
+        )
+
+    def handle(self, *args, **options):
+        referenced = set()
+        for picture, variants in User.objects.exclude(profile_picture="").values_list(
+            "profile_picture", "profile_picture_variants"
+        ):
+            referenced.add(picture)
+            for names in variants.get("images", {}).values():
+                referenced.update(names.values())
+
+        field = User._meta.get_field("profile_picture")
+        directory = default_storage.path(field.upload_to)
+        threshold = time.time() - options["min_age"]
+        delete = (
+            default_storage.prune
+            if isinstance(default_storage, ContentAddressedStorage)
+            else default_storage.delete
+        )
+
+        pruned = 0
+        for root, _, filenames in os.walk(directory):
+            for filename in filenames:
+                path = os.path.join(root, filename)
+                name = os.path.relpath(path, default_storage.location).replace(
+                    os.sep, "/"
+                )
+                if name not in referenced and os.path.getmtime(path) < threshold:
+                    delete(name)
+                    pruned += 1
+
+        self.stdout.write(f"Pruned {pruned} files")
@@ -0,0 +1,24 @@
+import datetime
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from ...events import prune_events
+
+
+class Command(BaseCommand):
+    help = "Delete user events older than the retention period"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.USER_EVENTS_RETENTION,
+            help="Keep the events of the last this many days",
+        )
+
+    def handle(self, *args, **options):
+        before = timezone.now() - datetime.timedelta(days=options["days"])
+        pruned = prune_events(before)
+
+        self.stdout.write(f"Pruned {pruned} events")
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from libs.cache import namespaces
+
+
+class Command(BaseCommand):
+    help = "Show the hit and miss counters of the user caches"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true")
+
+    def handle(self, *args, **options):
+        for name, namespace in sorted(namespaces.items()):
+            stats = namespace.get_stats()
+            lookups = stats["hits"] + stats["misses"]
+            ratio = stats["hits"] / lookups if lookups else 0
+
+            self.stdout.write(
+                f"{name:<24} hits: {stats['hits']:<10} "
+                f"misses: {stats['misses']:<10} hit ratio: {ratio:.2%}"
+            )
+
+            if options["reset"]:
+                namespace.reset_stats()
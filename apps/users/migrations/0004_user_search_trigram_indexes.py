@@ -0,0 +1,34 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+import libs.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_user_created_at_id_idx'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='user',
+            index=libs.models.TrigramIndex(fields=['first_name'], name='users_user_first_name_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=libs.models.TrigramIndex(fields=['last_name'], name='users_user_last_name_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=libs.models.TrigramIndex(fields=['email'], name='users_user_email_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=libs.models.TrigramIndex(fields=['phone_number'], name='users_user_phone_number_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=libs.models.TrigramIndex(fields=['id_number'], name='users_user_id_number_trgm'),
+        ),
+    ]
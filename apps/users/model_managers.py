@@ -1,4 +1,5 @@
 import re
+from django.db import models
 from django.contrib.auth.base_user import BaseUserManager
 from django.core.validators import validate_email
 from django.core.exceptions import ValidationError
@@ -6,7 +7,18 @@ from django.core.exceptions import ValidationError
 from .error_messages import errors
 
 
-class UserManager(BaseUserManager):
+class UserQuerySet(models.QuerySet):
+    """Custom user queryset"""
+
+    display_prefetch = ["groups"]
+
+    def for_display(self):
+        """Prefetch every relation rendered by the display serializers"""
+
+        return self.prefetch_related(*self.display_prefetch)
+
+
+class UserManager(BaseUserManager.from_queryset(UserQuerySet)):
     """Custom user manager"""
 
     def validate_email(self, email):
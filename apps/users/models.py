@@ -2,10 +2,13 @@ import random
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
 
-from libs.models import TimeStampModel
+from libs.models import TimeStampModel, TrigramIndex
 from .model_managers import UserManager
 
 
+SEARCH_FIELDS = ["first_name", "last_name", "email", "phone_number", "id_number"]
+
+
 class User(AbstractBaseUser, PermissionsMixin, TimeStampModel):
     """User model class"""
 
@@ -15,6 +18,7 @@ class User(AbstractBaseUser, PermissionsMixin, TimeStampModel):
     phone_number = models.CharField(max_length=50, null=True, unique=True)
     id_number = models.CharField(max_length=50, null=True, unique=True)
     profile_picture = models.ImageField(blank=True, upload_to="profile_pictures")
+    profile_picture_variants = models.JSONField(default=dict, blank=True)
     should_set_password = models.BooleanField(default=False)
 
     is_admin = models.BooleanField(default=False)
@@ -30,11 +34,39 @@ class User(AbstractBaseUser, PermissionsMixin, TimeStampModel):
     class Meta:
         verbose_name = "User"
         verbose_name_plural = "Users"
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="user_created_at_id_idx"),
+            *[
+                TrigramIndex(fields=[field], name=f"users_user_{field}_trgm")
+                for field in SEARCH_FIELDS
+            ],
+        ]
 
     def __str__(self):
         return self.email
 
 
+class UserEvent(models.Model):
+    """Change to a user, numbered by its id for clients to resume from"""
+
+    CREATED = "created"
+    UPDATED = "updated"
+    DELETED = "deleted"
+    ACTION_CHOICES = [
+        (CREATED, "Created"),
+        (UPDATED, "Updated"),
+        (DELETED, "Deleted"),
+    ]
+
+    user_id = models.BigIntegerField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = "User event"
+        verbose_name_plural = "User events"
+
+
 def generate_password():
     """Generate an 8 digits default password for user"""
 
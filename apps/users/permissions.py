@@ -1,6 +1,67 @@
+from django.db import transaction
 from rest_framework.permissions import DjangoModelPermissions
 
+from libs.cache import CacheNamespace
+from .models import User
+
+PERMISSIONS_TIMEOUT = 60 * 60
+
+permissions_cache = CacheNamespace("users:permissions", timeout=PERMISSIONS_TIMEOUT)
+
+
+def get_permissions_version():
+    return permissions_cache.version
+
+
+def bump_permissions_version():
+    """Invalidate the cached permissions of every user, again on commit"""
+
+    permissions_cache.invalidate()
+    transaction.on_commit(permissions_cache.invalidate)
+
+
+def invalidate_permissions(*user_ids):
+    """Invalidate the cached permissions of the given users, again on commit
+
+    Requests loading the permissions before the commit cache the ones
+    being replaced.
+    """
+
+    permissions_cache.delete_many(user_ids)
+    transaction.on_commit(lambda: permissions_cache.delete_many(user_ids))
+
+
+def load_permissions(user):
+    """Prime the user's permission cache from the shared cache
+
+    `ModelBackend` then answers `has_perm` from `_perm_cache` instead of
+    querying the user and group permissions.
+    """
+
+    if hasattr(user, "_perm_cache"):
+        return
+
+    user._perm_cache = permissions_cache.get_or_set(user.pk, user.get_all_permissions)
+
 
 class ModelPermissions(DjangoModelPermissions):
-    def __init__(self):
-        self.perms_map["GET"] = ["%(app_label)s.view_%(model_name)s"]
+    perms_map = {
+        **DjangoModelPermissions.perms_map,
+        "GET": ["%(app_label)s.view_%(model_name)s"],
+    }
+    required_permissions = {}
+
+    def get_required_permissions(self, method, model_cls):
+        key = (type(self), method, model_cls)
+        if key not in self.required_permissions:
+            self.required_permissions[key] = super().get_required_permissions(
+                method, model_cls
+            )
+
+        return self.required_permissions[key]
+
+    def has_permission(self, request, view):
+        if isinstance(request.user, User):
+            load_permissions(request.user)
+
+        return super().has_permission(request, view)
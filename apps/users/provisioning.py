@@ -0,0 +1,151 @@
+from django.conf import settings
+from django.db import transaction
+from django.contrib.auth.models import Group
+from django_rq import enqueue
+
+from libs.utils.helpers import find_taken_values, unique_violations_as_errors
+from .events import record_events
+from .models import User, UserEvent, generate_password
+from .serializers import UserSerializer, BulkUserSerializer
+from .error_messages import errors
+from . import tasks
+
+UNIQUE_FIELDS = UserSerializer.unique_fields
+ACTIVATION_BATCH_SIZE = 200
+
+
+def normalize_row(row):
+    """Turn a CSV `groups` cell such as `1;2` into a list of ids"""
+
+    groups = row.get("groups")
+    if isinstance(groups, str):
+        row = dict(row)
+        row["groups"] = [
+            group.strip() for group in groups.replace(",", ";").split(";") if group
+        ]
+
+    return row
+
+
+def provision_user(serializer):
+    """Create a user whose generated initial password is hashed only once
+
+    The row is written by a single INSERT, the welcome email is rendered
+    and sent by the worker once the transaction commits.
+    """
+
+    initial_password = generate_password()
+    user = serializer.save(password=initial_password, should_set_password=True)
+    if settings.ACCOUNT_EMAILS:
+        transaction.on_commit(
+            lambda: enqueue(tasks.send_account_email, user.pk, initial_password)
+        )
+
+    return user, initial_password
+
+
+def validate_rows(rows):
+    """Validate rows, checking uniqueness and groups once for the batch
+
+    Returns the validated rows and the failures, both keyed by row number.
+    """
+
+    valid, failed = {}, {}
+    for number, row in enumerate(rows, start=1):
+        serializer = BulkUserSerializer(data=normalize_row(row))
+        if serializer.is_valid():
+            valid[number] = serializer.validated_data
+        else:
+            failed[number] = serializer.errors
+
+    seen = {field: set() for field in UNIQUE_FIELDS}
+    taken = find_taken_values(User, list(valid.values()), UNIQUE_FIELDS)
+    group_ids = {group for data in valid.values() for group in data["groups"]}
+    existing_groups = set(
+        Group.objects.filter(id__in=group_ids).values_list("id", flat=True)
+    )
+
+    for number, data in list(valid.items()):
+        row_errors = {}
+        for field in UNIQUE_FIELDS:
+            value = data.get(field)
+            if value in taken[field]:
+                row_errors[field] = [errors[field]["unique"]]
+            elif value in seen[field]:
+                row_errors[field] = [errors[field]["duplicate"]]
+            seen[field].add(value)
+
+        missing = [group for group in data["groups"] if group not in existing_groups]
+        if missing:
+            row_errors["groups"] = [
+                errors["groups"]["does_not_exist"].format(pk=group) for group in missing
+            ]
+
+        if row_errors:
+            failed[number] = row_errors
+            del valid[number]
+
+    return valid, failed
+
+
+def provision_users(rows):
+    """Create users from validated rows with set-based inserts
+
+    Initial passwords are hashed and welcome emails sent by the worker, so
+    the request never pays one PBKDF2 call per user.
+    """
+
+    users, passwords = [], []
+    for data in rows:
+        data = dict(data)
+        data.pop("groups")
+        # The same flags as `UserManager.create_user`, rows never set them
+        user = User(
+            **data,
+            is_active=True,
+            is_staff=False,
+            is_admin=False,
+            is_superuser=False,
+            should_set_password=True,
+        )
+        user.set_unusable_password()
+        users.append(user)
+        passwords.append(generate_password())
+
+    with unique_violations_as_errors(User, UNIQUE_FIELDS, errors):
+        User.objects.bulk_create(users, batch_size=500)
+
+        if any(user.pk is None for user in users):
+            ids = dict(
+                User.objects.filter(
+                    email__in=[user.email for user in users]
+                ).values_list("email", "id")
+            )
+            for user in users:
+                user.pk = ids[user.email]
+
+        Membership = User.groups.through
+        Membership.objects.bulk_create(
+            [
+                Membership(user_id=user.pk, group_id=group)
+                for user, data in zip(users, rows)
+                for group in set(data["groups"])
+            ],
+            batch_size=500,
+        )
+
+        record_events(UserEvent.CREATED, [user.pk for user in users])
+
+        credentials = [(user.pk, password) for user, password in zip(users, passwords)]
+        transaction.on_commit(lambda: enqueue_activation(credentials))
+
+    return list(zip(users, passwords))
+
+
+def enqueue_activation(credentials):
+    if not settings.ACCOUNT_EMAILS:
+        return
+
+    for start in range(0, len(credentials), ACTIVATION_BATCH_SIZE):
+        end = start + ACTIVATION_BATCH_SIZE
+        enqueue(tasks.activate_accounts, credentials[start:end])
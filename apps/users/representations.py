@@ -0,0 +1,71 @@
+import hashlib
+from django.conf import settings
+from django.utils import timezone
+
+from libs.cache import CacheNamespace
+from libs.timing import span
+from .events import record_events
+from .models import User, UserEvent
+from .serializers import UserDisplaySerializer
+
+REPRESENTATION_FIELDS = ["id", "created_at", "updated_at"]
+
+representations_cache = CacheNamespace("users:representation")
+
+
+def representation_key_parts(user, base_url):
+    """Key parts of a user's serialized payload
+
+    They include `updated_at`, so saving a user makes the previous entry
+    unreachable; the base URL is part of them because `profile_picture` is
+    rendered as an absolute URL.
+    """
+
+    base = hashlib.md5(base_url.encode()).hexdigest()[:8]
+    return (base, user.pk, user.updated_at.timestamp())
+
+
+def touch_users(queryset):
+    """Bump `updated_at` so the users' cached payloads are rebuilt"""
+
+    user_ids = list(queryset.values_list("pk", flat=True))
+    User.objects.filter(pk__in=user_ids).update(updated_at=timezone.now())
+    record_events(UserEvent.UPDATED, user_ids)
+
+
+def get_stats():
+    return representations_cache.get_stats()
+
+
+def reset_stats():
+    representations_cache.reset_stats()
+
+
+def get_representations(users, request):
+    """Return the serialized users, in order, rendering only cache misses
+
+    Only `id` and `updated_at` are read from `users`. Misses are loaded in
+    one query with their relations and rendered by `UserDisplaySerializer`;
+    users deleted in the meantime are left out.
+    """
+
+    with span("serialize"):
+        return render_representations(users, request)
+
+
+def render_representations(users, request):
+    base_url = request.build_absolute_uri("/")
+    keys = {user.pk: representation_key_parts(user, base_url) for user in users}
+    payloads = representations_cache.get_many(keys.values())
+
+    missing = [pk for pk, key in keys.items() if key not in payloads]
+    if missing:
+        instances = User.objects.for_display().in_bulk(missing)
+        rendered = {
+            keys[pk]: UserDisplaySerializer(user, context={"request": request}).data
+            for pk, user in instances.items()
+        }
+        representations_cache.set_many(rendered, settings.USER_REPRESENTATION_TIMEOUT)
+        payloads.update(rendered)
+
+    return [payloads[keys[user.pk]] for user in users if keys[user.pk] in payloads]
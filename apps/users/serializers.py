@@ -1,12 +1,21 @@
 import re
 from rest_framework import serializers
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.contrib.auth.models import Group
+from django.db.models import prefetch_related_objects
 
-from libs.utils.helpers import check_unique_value
+from libs.fields import BulkPrimaryKeyRelatedField
+from libs.metrics import LOGINS
+from libs.timing import span
+from libs.utils.helpers import find_taken_values, unique_violations_as_errors
 from .models import User
+from .model_managers import UserQuerySet
+from .authentication import add_token_claims
 from .error_messages import errors
 
+PHONE_NUMBER_REGEX = r"^\+(?:[0-9] ?){6,14}[0-9]$"
+
 
 class GroupSerializer(serializers.ModelSerializer):
     class Meta:
@@ -16,6 +25,7 @@ class GroupSerializer(serializers.ModelSerializer):
 
 class UserDisplaySerializer(serializers.ModelSerializer):
     groups = GroupSerializer(many=True)
+    profile_picture_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = User
@@ -27,6 +37,7 @@ class UserDisplaySerializer(serializers.ModelSerializer):
             "phone_number",
             "id_number",
             "profile_picture",
+            "profile_picture_variants",
             "should_set_password",
             "is_active",
             "is_staff",
@@ -36,6 +47,28 @@ class UserDisplaySerializer(serializers.ModelSerializer):
             "updated_at",
         ]
 
+    def get_profile_picture_variants(self, user):
+        """URLs of the resized pictures, once built for the current picture"""
+
+        variants = user.profile_picture_variants
+        if (
+            not user.profile_picture
+            or variants.get("source") != user.profile_picture.name
+        ):
+            return {}
+
+        storage = user.profile_picture.storage
+        request = self.context.get("request")
+
+        def get_url(name):
+            url = storage.url(name)
+            return request.build_absolute_uri(url) if request else url
+
+        return {
+            variant: {extension: get_url(name) for extension, name in names.items()}
+            for variant, names in variants["images"].items()
+        }
+
 
 class UserSerializer(serializers.ModelSerializer):
     """User serializer"""
@@ -76,9 +109,9 @@ class UserSerializer(serializers.ModelSerializer):
             "blank": errors["id_number"]["blank"],
         },
     )
-    groups = serializers.SlugRelatedField(
-        slug_field="id", many=True, queryset=Group.objects.all()
-    )
+    groups = BulkPrimaryKeyRelatedField(many=True, queryset=Group.objects.all())
+
+    unique_fields = ["email", "phone_number", "id_number"]
 
     class Meta:
         model = User
@@ -100,43 +133,103 @@ class UserSerializer(serializers.ModelSerializer):
         ]
 
     def validate_email(self, email):
-        norm_email = email.lower()
-        check_unique_value(User, "email", email, errors)
-
-        return norm_email
+        return email.lower()
 
     def validate_phone_number(self, phone_number):
-        phone_number_regex = r"^\+(?:[0-9] ?){6,14}[0-9]$"
-
-        if not re.match(phone_number_regex, phone_number):
+        if not re.match(PHONE_NUMBER_REGEX, phone_number):
             raise serializers.ValidationError(errors["phone_number"]["invalid"])
 
-        check_unique_value(User, "phone_number", phone_number, errors)
-
         return phone_number
 
-    def validate_id_number(self, id_number):
-        check_unique_value(User, "id_number", id_number, errors)
+    def validate(self, attrs):
+        taken = find_taken_values(
+            User, [attrs], self.unique_fields, exclude=self.instance
+        )
+        unique_errors = {
+            field: [errors[field]["unique"]]
+            for field in self.unique_fields
+            if attrs.get(field) in taken[field]
+        }
+        if unique_errors:
+            raise serializers.ValidationError(unique_errors)
 
-        return id_number
+        return attrs
 
     def create(self, validated_data):
         groups = validated_data.pop("groups")
-        user = User.objects.create_user(**validated_data)
-        user.groups.set(groups)
+
+        with unique_violations_as_errors(User, self.unique_fields, errors):
+            user = User.objects.create_user(**validated_data)
+
+            Membership = User.groups.through
+            Membership.objects.bulk_create(
+                [
+                    Membership(user_id=user.pk, group_id=group.pk)
+                    for group in set(groups)
+                ]
+            )
         return user
 
+    def update(self, instance, validated_data):
+        with unique_violations_as_errors(User, self.unique_fields, errors):
+            return super().update(instance, validated_data)
+
+
+class BulkUserSerializer(UserSerializer):
+    """Bulk user row serializer
+
+    Uniqueness and groups are checked for the whole batch at once, see
+    `apps.users.provisioning`.
+    """
+
+    groups = serializers.ListField(child=serializers.IntegerField())
+
+    class Meta(UserSerializer.Meta):
+        fields = [
+            "first_name",
+            "last_name",
+            "email",
+            "phone_number",
+            "id_number",
+            "groups",
+        ]
+
+    def validate(self, attrs):
+        return attrs
+
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     """Custom TokenObtainPairSerializer"""
 
-    def validate(self, attrs):
-        super().validate(attrs)
+    @classmethod
+    def get_token(cls, user):
+        return add_token_claims(super().get_token(user), user)
 
-        token = self.get_token(self.user)
+    def get_includes(self):
+        request = self.context.get("request")
+        if request is None:
+            return set()
 
-        return {
-            "access_token": str(token.access_token),
-            "refresh_token": str(token),
-            "user": UserSerializer(self.user).data,
-        }
+        return set(request.query_params.get("include", "").split(","))
+
+    def validate(self, attrs):
+        with span("authenticate"):
+            try:
+                super().validate(attrs)
+            except AuthenticationFailed:
+                LOGINS.labels("failure").inc()
+                raise
+        LOGINS.labels("success").inc()
+
+        with span("serialize"):
+            token = self.get_token(self.user)
+            data = {
+                "access_token": str(token.access_token),
+                "refresh_token": str(token),
+            }
+
+            if "user" in self.get_includes():
+                prefetch_related_objects([self.user], *UserQuerySet.display_prefetch)
+                data["user"] = UserSerializer(self.user).data
+
+        return data
@@ -0,0 +1,93 @@
+from django.contrib.auth.models import Group, Permission
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.db import transaction
+from django.dispatch import receiver
+from django_rq import enqueue
+
+from .events import record_events
+from .models import User, UserEvent
+from .permissions import bump_permissions_version, invalidate_permissions
+from .authentication import invalidate_auth_versions
+from .representations import touch_users
+from . import tasks
+
+UNDISPLAYED_FIELDS = {"password", "last_login"}
+
+
+def invalidate_users(*user_ids):
+    invalidate_permissions(*user_ids)
+    invalidate_auth_versions(*user_ids)
+
+
+@receiver(m2m_changed, sender=User.user_permissions.through)
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_user_permissions(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith("post_"):
+        return
+
+    if not reverse:
+        invalidate_users(instance.pk)
+    elif pk_set:
+        invalidate_users(*pk_set)
+    else:
+        bump_permissions_version()
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_group_permissions(sender, action, **kwargs):
+    if action.startswith("post_"):
+        bump_permissions_version()
+
+
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=Permission)
+def invalidate_deleted_permissions(sender, **kwargs):
+    bump_permissions_version()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_saved_user(sender, instance, **kwargs):
+    invalidate_users(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def record_saved_user(sender, instance, created, update_fields=None, **kwargs):
+    # Password rehashes and logins change nothing clients display
+    if update_fields and set(update_fields) <= UNDISPLAYED_FIELDS:
+        return
+
+    action = UserEvent.CREATED if created else UserEvent.UPDATED
+    record_events(action, [instance.pk])
+
+
+@receiver(post_delete, sender=User)
+def record_deleted_user(sender, instance, **kwargs):
+    record_events(UserEvent.DELETED, [instance.pk])
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def touch_group_members(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action.startswith("post_"):
+            touch_users(User.objects.filter(pk=instance.pk))
+    elif action == "pre_clear":
+        touch_users(User.objects.filter(groups=instance))
+    elif action.startswith("post_") and pk_set:
+        touch_users(User.objects.filter(pk__in=pk_set))
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def touch_changed_group_members(sender, instance, created=False, **kwargs):
+    if not created:
+        touch_users(User.objects.filter(groups=instance))
+
+
+@receiver(post_save, sender=User)
+def schedule_profile_picture_processing(sender, instance, **kwargs):
+    picture = instance.profile_picture
+    if picture and instance.profile_picture_variants.get("source") != picture.name:
+        transaction.on_commit(
+            lambda: enqueue(tasks.process_profile_picture, instance.pk)
+        )
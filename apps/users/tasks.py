@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+
+from libs.images import build_variants
+from libs.notifications import Notification
+from .events import record_events
+from .models import User, UserEvent
+
+new_account = Notification("New Account", "new_account")
+
+
+def send_account_email(user_id, initial_password):
+    """Email a new user their initial password"""
+
+    user = User.objects.get(pk=user_id)
+    new_account.send({"user": user, "initial_password": initial_password}, [user.email])
+
+
+def activate_accounts(credentials):
+    """Set the initial passwords of provisioned users and email them"""
+
+    passwords = dict(credentials)
+    users = list(User.objects.filter(pk__in=passwords))
+    for user in users:
+        user.password = make_password(passwords[user.pk])
+    User.objects.bulk_update(users, ["password"])
+
+    for user in users:
+        new_account.send(
+            {"user": user, "initial_password": passwords[user.pk]}, [user.email]
+        )
+
+
+def process_profile_picture(user_id):
+    """Build the resized variants of a user's profile picture
+
+    Running it again for the same picture is a no-op. Variants of a picture
+    replaced in the meantime, like those of previous pictures, are left to
+    `prune_media`.
+    """
+
+    user = User.objects.filter(pk=user_id).first()
+    if user is None or not user.profile_picture:
+        return
+
+    if user.profile_picture_variants.get("source") == user.profile_picture.name:
+        return
+
+    images = build_variants(user.profile_picture, settings.PROFILE_PICTURE_SIZES)
+    updated = User.objects.filter(
+        pk=user_id, profile_picture=user.profile_picture.name
+    ).update(
+        profile_picture_variants={
+            "source": user.profile_picture.name,
+            "images": images,
+        },
+        updated_at=timezone.now(),
+    )
+
+    if updated:
+        record_events(UserEvent.UPDATED, [user_id])
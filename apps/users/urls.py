@@ -1,9 +1,25 @@
+from django.conf import settings
 from django.urls import path
 
-from .views import UsersView, CustomTokenObtainPairView, UserDetailsView
+from libs.asgi import as_async_view
+from .views import (
+    UsersView,
+    BulkUsersView,
+    UsersExportView,
+    CustomTokenObtainPairView,
+    UserDetailsView,
+)
+
+
+def as_view(view_class):
+    view = view_class.as_view()
+    return as_async_view(view) if settings.ASYNC_VIEWS else view
+
 
 urlpatterns = [
-    path("", UsersView.as_view()),
-    path("login/", CustomTokenObtainPairView.as_view()),
-    path("<int:pk>/", UserDetailsView.as_view()),
+    path("", as_view(UsersView)),
+    path("bulk/", BulkUsersView.as_view()),
+    path("export/", UsersExportView.as_view()),
+    path("login/", as_view(CustomTokenObtainPairView)),
+    path("<int:pk>/", as_view(UserDetailsView)),
 ]
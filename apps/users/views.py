@@ -1,22 +1,40 @@
-from rest_framework import mixins, generics
+import csv
+from itertools import islice
+from rest_framework import mixins, generics, status
+from rest_framework.parsers import JSONParser, MultiPartParser
+from rest_framework.response import Response
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework.permissions import IsAuthenticated
-from django_rq import enqueue
-from django.template.loader import get_template
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 
-from .models import User, generate_password
+from .models import User
 from .serializers import (
     UserSerializer,
     UserDisplaySerializer,
+    BulkUserSerializer,
     CustomTokenObtainPairSerializer,
 )
 from .permissions import ModelPermissions
-from libs.utils.helpers import send_email
+from .provisioning import validate_rows, provision_user, provision_users
+from .exports import EXPORT_FIELDS, export_chunks
+from .representations import REPRESENTATION_FIELDS, get_representations
+from .error_messages import errors
+from libs.exports import EXPORT_FORMATS
+from libs.pagination import KeysetPagination
+from libs.filters import RankedSearchFilter
+from libs.parsers import CSVParser, read_csv
+from libs.views import ConditionalGetMixin
 
 
 class UsersView(
-    mixins.CreateModelMixin, mixins.ListModelMixin, generics.GenericAPIView
+    ConditionalGetMixin,
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    generics.GenericAPIView,
 ):
     """User viewsets
 
@@ -30,9 +48,11 @@ class UsersView(
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated, ModelPermissions]
+    pagination_class = KeysetPagination
+    filter_backends = [RankedSearchFilter]
     search_fields = [
         "first_name",
-        "lastname",
+        "last_name",
         "email",
         "phone_number",
         "id_number",
@@ -40,31 +60,159 @@ class UsersView(
     ]
 
     def post(self, request, *args, **kwargs):
-        response = self.create(request, *args, **kwargs)
-
-        # Generate password
-        user_id = response.data["id"]
-        user = User.objects.get(id=user_id)
-        initial_password = generate_password()
-        user.set_password(initial_password)
-        user.should_set_password = True
-        user.save()
-
-        # Send email
-        subject = "New Account"
-        message = get_template("new_account.html").render(
-            {"user": user, "initial_password": initial_password}
-        )
-        enqueue(send_email, subject, message, [user.email])
+        with transaction.atomic():
+            response = self.create(request, *args, **kwargs)
 
-        response.data["initial_password"] = initial_password
-        response.data["should_set_password"] = user.should_set_password
+        response.data["initial_password"] = self.initial_password
         return response
 
+    def perform_create(self, serializer):
+        _, self.initial_password = provision_user(serializer)
+
+    def get_queryset(self):
+        if self.request.method == "GET":
+            return User.objects.only(*REPRESENTATION_FIELDS)
+
+        return super().get_queryset()
+
+    def get_serializer_class(self):
+        if self.request.method == "GET":
+            return UserDisplaySerializer
+
+        return super().get_serializer_class()
+
+    def get_validators(self, request):
+        """Validate a page by the id and `updated_at` of its rows
+
+        Only the requested keyset page is read, by the same index range
+        query that serves it, so a 304 costs that query alone. Deleting a
+        user can make the latest `updated_at` of a page older, which is why
+        no Last-Modified is sent.
+        """
+
+        queryset = self.filter_queryset(self.get_queryset())
+        self.page = self.paginate_queryset(queryset)
+        self.users = list(queryset) if self.page is None else self.page
+
+        parts = [request.get_full_path()]
+        parts += [(user.pk, user.updated_at) for user in self.users]
+        if self.page is not None:
+            paginator = self.paginator
+            parts += [paginator.has_next, paginator.has_previous, paginator.count]
+
+        return parts, None
+
     def get(self, request, *args, **kwargs):
-        self.serializer_class = UserDisplaySerializer
+        return self.conditional_get(request, self.render_list)
+
+    def render_list(self):
+        data = get_representations(self.users, self.request)
+
+        if self.page is None:
+            return Response(data)
+
+        return self.get_paginated_response(data)
+
+
+class UsersExportView(generics.GenericAPIView):
+    """Users export
+
+    get:
+        Stream every user matching the list filters as CSV or NDJSON
+    """
+
+    queryset = User.objects.all()
+    serializer_class = UserDisplaySerializer
+    permission_classes = [IsAuthenticated, ModelPermissions]
+    pagination_class = KeysetPagination
+    filter_backends = UsersView.filter_backends
+    search_fields = UsersView.search_fields
+    chunk_size = 2000
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(
+                "file_type",
+                openapi.IN_QUERY,
+                enum=list(EXPORT_FORMATS),
+                default="csv",
+                type=openapi.TYPE_STRING,
+            )
+        ],
+        responses={200: "CSV or NDJSON stream of users"},
+    )
+    def get(self, request, *args, **kwargs):
+        file_type = request.query_params.get("file_type", "csv")
+        if file_type not in EXPORT_FORMATS:
+            message = errors["export"]["file_type"].format(
+                choices=", ".join(EXPORT_FORMATS)
+            )
+            raise ValidationError({"file_type": [message]})
+
+        queryset = self.filter_queryset(self.get_queryset())
+        ordering = self.paginator.get_ordering(request, queryset, self)
+        content_type, encode = EXPORT_FORMATS[file_type]
+
+        response = StreamingHttpResponse(
+            encode(export_chunks(queryset, ordering, self.chunk_size), EXPORT_FIELDS),
+            content_type=content_type,
+        )
+        response["Content-Disposition"] = f'attachment; filename="users.{file_type}"'
+
+        return response
+
+
+class BulkUsersView(generics.GenericAPIView):
+    """Bulk user provisioning
+
+    post:
+        Create users from a JSON array, a `text/csv` body or a CSV `file` upload
+    """
+
+    queryset = User.objects.all()
+    serializer_class = BulkUserSerializer
+    permission_classes = [IsAuthenticated, ModelPermissions]
+    parser_classes = [JSONParser, CSVParser, MultiPartParser]
+    max_rows = 10000
 
-        return self.list(request, *args, **kwargs)
+    def get_rows(self, request):
+        if "file" in request.FILES:
+            return read_csv(request.FILES["file"])
+
+        if isinstance(request.data, (list, csv.DictReader)):
+            return request.data
+
+        raise ValidationError({"detail": errors["users"]["not_a_list"]})
+
+    def post(self, request, *args, **kwargs):
+        rows = list(islice(self.get_rows(request), self.max_rows + 1))
+        if len(rows) > self.max_rows:
+            message = errors["users"]["max_rows"].format(max_rows=self.max_rows)
+            raise ValidationError({"detail": message})
+
+        valid, failed = validate_rows(rows)
+        created = provision_users(list(valid.values())) if valid else []
+
+        results = [
+            {"row": number, "status": "failed", "errors": row_errors}
+            for number, row_errors in failed.items()
+        ]
+        for number, (user, initial_password) in zip(valid, created):
+            results.append(
+                {
+                    "row": number,
+                    "status": "created",
+                    "id": user.pk,
+                    "email": user.email,
+                    "initial_password": initial_password,
+                }
+            )
+        results.sort(key=lambda result: result["row"])
+
+        return Response(
+            {"created": len(created), "failed": len(failed), "results": results},
+            status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST,
+        )
 
 
 class CustomTokenObtainPairView(TokenObtainPairView):
@@ -76,12 +224,23 @@ class CustomTokenObtainPairView(TokenObtainPairView):
 
     serializer_class = CustomTokenObtainPairSerializer
 
-    @swagger_auto_schema(responses={200: CustomTokenObtainPairSerializer})
+    @swagger_auto_schema(
+        responses={200: CustomTokenObtainPairSerializer},
+        manual_parameters=[
+            openapi.Parameter(
+                "include",
+                openapi.IN_QUERY,
+                description="Comma separated expansions, `user` adds the user",
+                type=openapi.TYPE_STRING,
+            )
+        ],
+    )
     def post(self, request, *args, **kwargs):
         return super().post(request, *args, **kwargs)
 
 
 class UserDetailsView(
+    ConditionalGetMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
     mixins.DestroyModelMixin,
@@ -102,9 +261,32 @@ class UserDetailsView(
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated, ModelPermissions]
 
+    def get_queryset(self):
+        if self.request.method == "GET":
+            return User.objects.only(*REPRESENTATION_FIELDS)
+
+        return super().get_queryset()
+
+    def get_serializer_class(self):
+        if self.request.method == "GET":
+            return UserDisplaySerializer
+
+        return super().get_serializer_class()
+
+    def get_validators(self, request):
+        self.object = self.get_object()
+
+        return [self.object.pk, self.object.updated_at], self.object.updated_at
+
     def get(self, request, *args, **kwargs):
-        self.serializer_class = UserDisplaySerializer
-        return self.retrieve(request, *args, **kwargs)
+        return self.conditional_get(request, self.render_object)
+
+    def render_object(self):
+        data = get_representations([self.object], self.request)
+        if not data:
+            raise NotFound()
+
+        return Response(data[0])
 
     def patch(self, request, *args, **kwargs):
         return self.partial_update(request, *args, **kwargs)
@@ -0,0 +1,126 @@
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.handlers import asgi
+from django.db import close_old_connections, connections
+
+from .timing import instrument
+
+_executor = None
+
+
+def get_executor():
+    """Return the process wide pool running the blocking part of async views"""
+
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.ASYNC_VIEW_THREADS, thread_name_prefix="async-view"
+        )
+
+    return _executor
+
+
+def run_view(view, request, *args, **kwargs):
+    """Run a sync view, rendering its response, in a pool thread
+
+    Connections are checked around the call like `request_started` and
+    `request_finished` do for the request thread, so each pool thread keeps
+    one persistent connection for at most CONN_MAX_AGE.
+    """
+
+    close_old_connections()
+    try:
+        with instrument():
+            response = view(request, *args, **kwargs)
+            if callable(getattr(response, "render", None)):
+                response = response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+def as_async_view(view):
+    """Async variant of a sync view
+
+    The event loop only waits on the client while the ORM queries, password
+    hashing and serialization run in the bounded pool, so slow clients do
+    not each hold a thread.
+    """
+
+    @functools.wraps(view)
+    async def async_view(request, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        call = functools.partial(run_view, view, request, *args, **kwargs)
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(get_executor(), context.run, call)
+
+    return async_view
+
+
+def get_response_headers(response):
+    headers = []
+    for header, value in response.items():
+        if isinstance(header, str):
+            header = header.encode("ascii")
+        if isinstance(value, str):
+            value = value.encode("latin1")
+        headers.append((bytes(header), bytes(value)))
+    for cookie in response.cookies.values():
+        headers.append(
+            (b"Set-Cookie", cookie.output(header="").encode("ascii").strip())
+        )
+
+    return headers
+
+
+def close_streaming_response(response):
+    try:
+        response.close()
+    finally:
+        connections.close_all()
+
+
+class ASGIHandler(asgi.ASGIHandler):
+    """ASGI handler consuming streaming responses off the event loop
+
+    Django iterates streaming content on the event loop, where the queries
+    of a streamed export would block every other client. Each streaming
+    response is consumed by a dedicated thread instead, so a server-side
+    cursor always stays on the connection that opened it.
+    """
+
+    async def send_response(self, response, send):
+        if not response.streaming:
+            return await super().send_response(response, send)
+
+        await send(
+            {
+                "type": "http.response.start",
+                "status": response.status_code,
+                "headers": get_response_headers(response),
+            }
+        )
+
+        loop = asyncio.get_running_loop()
+        done = object()
+        with ThreadPoolExecutor(1, thread_name_prefix="asgi-stream") as executor:
+            try:
+                parts = iter(response)
+                while True:
+                    part = await loop.run_in_executor(executor, next, parts, done)
+                    if part is done:
+                        break
+                    for chunk, _ in self.chunk_bytes(part):
+                        await send(
+                            {
+                                "type": "http.response.body",
+                                "body": chunk,
+                                "more_body": True,
+                            }
+                        )
+                await send({"type": "http.response.body"})
+            finally:
+                await loop.run_in_executor(executor, close_streaming_response, response)
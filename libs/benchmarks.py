@@ -0,0 +1,75 @@
+import time
+import tracemalloc
+
+# Metrics compared against a baseline, with whether a higher value is better
+METRICS = {
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+    "throughput": True,
+    "peak_memory_kb": False,
+}
+
+
+def percentile(values, fraction):
+    """Linearly interpolated percentile of a list of numbers"""
+
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def measure(call, requests, memory_requests=10):
+    """Latency percentiles, throughput and peak memory of `call`
+
+    Latencies are timed first without tracing, since tracemalloc slows
+    every allocation, then the peak memory of a few more calls is traced.
+    """
+
+    durations = []
+    started = time.perf_counter()
+    for _ in range(requests):
+        start = time.perf_counter()
+        call()
+        durations.append(time.perf_counter() - start)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    try:
+        for _ in range(memory_requests):
+            call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "requests": requests,
+        "p50_ms": round(percentile(durations, 0.5) * 1000, 3),
+        "p95_ms": round(percentile(durations, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(durations, 0.99) * 1000, 3),
+        "throughput": round(requests / elapsed, 2),
+        "peak_memory_kb": round(peak / 1024, 1),
+    }
+
+
+def find_regressions(results, baseline, threshold):
+    """Describe the metrics more than `threshold` worse than the baseline"""
+
+    regressions = []
+    for name, metrics in results.items():
+        previous = baseline.get(name, {})
+        for metric, higher_is_better in METRICS.items():
+            if not previous.get(metric) or metric not in metrics:
+                continue
+
+            change = metrics[metric] / previous[metric] - 1
+            if (-change if higher_is_better else change) > threshold:
+                regressions.append(
+                    f"{name} {metric}: {previous[metric]} -> {metrics[metric]} "
+                    f"({change:+.0%})"
+                )
+
+    return regressions
@@ -0,0 +1,241 @@
+import math
+import random
+import time
+import uuid
+from functools import wraps
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db.models.query import QuerySet
+from rest_framework.serializers import BaseSerializer
+
+from .timing import record_cache
+
+STATS_EVENTS = ("hits", "misses")
+
+namespaces = {}
+
+
+def as_parts(parts):
+    return tuple(parts) if isinstance(parts, (list, tuple)) else (parts,)
+
+
+class CacheNamespace:
+    """A family of cache entries sharing a key prefix, a version and stats
+
+    Keys embed the namespace's version, so `invalidate` drops every entry at
+    once by bumping it. Lookups count towards the namespace's hits and
+    misses, which like the entries live in the shared cache and so cover
+    the web and worker processes alike.
+
+    `get_or_set` protects expensive entries from stampedes: an entry may be
+    recomputed shortly before it expires, with a probability growing with
+    its compute time, and only by the one process holding its lock while
+    the others keep serving the current value.
+    """
+
+    beta = 1.0
+    lock_timeout = 10
+    lock_wait = 1
+    lock_poll_interval = 0.05
+
+    def __init__(self, name, timeout=DEFAULT_TIMEOUT, alias="default"):
+        self.name = name
+        self.timeout = timeout
+        self.alias = alias
+        namespaces[name] = self
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    @property
+    def version(self):
+        # Start from the clock, so a version evicted from the cache never
+        # makes older entries reachable again
+        return self.cache.get_or_set(f"{self.name}:version", time.time_ns, None)
+
+    def invalidate(self):
+        """Make every entry of the namespace unreachable"""
+
+        try:
+            self.cache.incr(f"{self.name}:version")
+        except ValueError:
+            self.cache.set(f"{self.name}:version", time.time_ns(), None)
+
+    def key(self, *parts):
+        return self.make_key(self.version, parts)
+
+    def make_key(self, version, parts):
+        return ":".join(str(part) for part in (self.name, version, *parts))
+
+    def keys(self, parts_list):
+        version = self.version
+        return {
+            as_parts(parts): self.make_key(version, as_parts(parts))
+            for parts in parts_list
+        }
+
+    def get_timeout(self, timeout):
+        return self.timeout if timeout is DEFAULT_TIMEOUT else timeout
+
+    def wrap(self, value, timeout, delta=0):
+        timeout = self.get_timeout(timeout)
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.cache.default_timeout
+        expires_at = time.time() + timeout if timeout is not None else None
+
+        return (value, expires_at, delta)
+
+    def get(self, *parts, default=None):
+        entry = self.cache.get(self.key(*parts))
+        self.record(hits=int(entry is not None), misses=int(entry is None))
+
+        return default if entry is None else entry[0]
+
+    def get_many(self, parts_list):
+        """Return the cached values, keyed by their parts, of the given keys"""
+
+        keys = self.keys(parts_list)
+        entries = self.cache.get_many(list(keys.values()))
+        self.record(hits=len(entries), misses=len(keys) - len(entries))
+
+        return {parts: entries[key][0] for parts, key in keys.items() if key in entries}
+
+    def set(self, parts, value, timeout=DEFAULT_TIMEOUT):
+        entry = self.wrap(value, timeout)
+        self.cache.set(self.key(*as_parts(parts)), entry, self.get_timeout(timeout))
+
+    def set_many(self, values, timeout=DEFAULT_TIMEOUT):
+        """Cache a mapping of key parts to values"""
+
+        keys = self.keys(values)
+        self.cache.set_many(
+            {
+                keys[as_parts(parts)]: self.wrap(value, timeout)
+                for parts, value in values.items()
+            },
+            self.get_timeout(timeout),
+        )
+
+    def delete_many(self, parts_list):
+        self.cache.delete_many(list(self.keys(parts_list).values()))
+
+    def is_fresh(self, entry):
+        value, expires_at, delta = entry
+        if expires_at is None or not delta:
+            return True
+
+        # Probabilistic early expiration, see Vattani et al., "Optimal
+        # Probabilistic Cache Stampede Prevention"
+        jitter = -delta * self.beta * math.log(1 - random.random())
+        return time.time() + jitter < expires_at
+
+    def get_or_set(self, parts, compute, timeout=DEFAULT_TIMEOUT):
+        """Return the cached value of `parts`, computing it on a miss"""
+
+        key = self.key(*as_parts(parts))
+        entry = self.cache.get(key)
+        if entry is not None and self.is_fresh(entry):
+            self.record(hits=1)
+            return entry[0]
+
+        self.record(misses=1)
+        lock, token = f"{key}:lock", uuid.uuid4().hex
+        acquired = self.cache.add(lock, token, self.lock_timeout)
+        if not acquired:
+            if entry is not None:
+                return entry[0]
+
+            entry = self.wait(key)
+            if entry is not None:
+                return entry[0]
+
+        try:
+            start = time.monotonic()
+            value = compute()
+            entry = self.wrap(value, timeout, delta=time.monotonic() - start)
+            self.cache.set(key, entry, self.get_timeout(timeout))
+        finally:
+            # Leave a lock which expired meanwhile to its new holder
+            if acquired and self.cache.get(lock) == token:
+                self.cache.delete(lock)
+
+        return value
+
+    def wait(self, key):
+        """Wait for the process holding a key's lock to cache its value"""
+
+        deadline = time.monotonic() + self.lock_wait
+        while time.monotonic() < deadline:
+            time.sleep(self.lock_poll_interval)
+            entry = self.cache.get(key)
+            if entry is not None:
+                return entry
+
+        return None
+
+    def stats_key(self, event):
+        return f"stats:{self.name}:{event}"
+
+    def record(self, **counts):
+        record_cache(**counts)
+        for event, value in counts.items():
+            if not value:
+                continue
+
+            key = self.stats_key(event)
+            try:
+                self.cache.incr(key, value)
+            except ValueError:
+                if not self.cache.add(key, value, None):
+                    self.cache.incr(key, value)
+
+    def get_stats(self):
+        keys = {event: self.stats_key(event) for event in STATS_EVENTS}
+        values = self.cache.get_many(list(keys.values()))
+
+        return {event: values.get(key, 0) for event, key in keys.items()}
+
+    def reset_stats(self):
+        self.cache.delete_many([self.stats_key(event) for event in STATS_EVENTS])
+
+
+def to_cacheable(value):
+    """Evaluate querysets and serializers into plain, picklable data"""
+
+    if isinstance(value, QuerySet):
+        return list(value)
+    if isinstance(value, BaseSerializer):
+        return value.data
+
+    return value
+
+
+def cached(namespace, key=None, timeout=DEFAULT_TIMEOUT):
+    """Read-through cache the results of a function in `namespace`
+
+    Entries are keyed by the function's name and arguments, or by the parts
+    `key(*args, **kwargs)` returns. Querysets are cached as lists of
+    instances and serializers as their `data`.
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if key is not None:
+                parts = as_parts(key(*args, **kwargs))
+            else:
+                parts = (
+                    func.__qualname__,
+                    *args,
+                    *(f"{name}={value}" for name, value in sorted(kwargs.items())),
+                )
+
+            return namespace.get_or_set(
+                parts, lambda: to_cacheable(func(*args, **kwargs)), timeout
+            )
+
+        wrapper.invalidate = namespace.invalidate
+        return wrapper
+
+    return decorator
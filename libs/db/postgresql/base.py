@@ -0,0 +1,61 @@
+import logging
+import os
+from django.db.backends.postgresql import base
+
+from ...metrics import DB_CONNECTIONS
+
+logger = logging.getLogger(__name__)
+
+stats = {"connections": 0, "reuses": 0}
+
+
+def get_connection_stats():
+    """Connections opened and reused by this worker process"""
+
+    uses = stats["connections"] + stats["reuses"]
+    return {**stats, "reuse_rate": stats["reuses"] / uses if uses else 0.0}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL backend with connection health checks and reuse stats
+
+    With `CONN_HEALTH_CHECKS`, a persistent connection is checked with
+    `SELECT 1` the first time a request uses it, and replaced when the
+    server or a pooler dropped it, instead of failing the request.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.settings_dict.setdefault("CONN_HEALTH_CHECKS", False)
+        self.checked = False
+
+    def connect(self):
+        # A new connection needs no health check, connecting uses it already
+        self.checked = True
+        super().connect()
+        stats["connections"] += 1
+        DB_CONNECTIONS.labels("opened").inc()
+        logger.info(
+            "Opened a database connection in worker %s: %s",
+            os.getpid(),
+            get_connection_stats(),
+        )
+
+    def ensure_connection(self):
+        if self.connection is not None and not self.checked:
+            self.checked = True
+            if (
+                self.settings_dict["CONN_HEALTH_CHECKS"]
+                and not self.in_atomic_block
+                and not self.is_usable()
+            ):
+                self.close()
+            else:
+                stats["reuses"] += 1
+                DB_CONNECTIONS.labels("reused").inc()
+
+        super().ensure_connection()
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        self.checked = False
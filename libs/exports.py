@@ -0,0 +1,49 @@
+import csv
+from datetime import datetime
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+class Echo:
+    """File-like object handing back what `csv.writer` writes"""
+
+    def write(self, value):
+        return value
+
+
+def csv_value(value):
+    """Lists are joined with `;`, the format the CSV parsers split on"""
+
+    if isinstance(value, list):
+        return ";".join(str(item) for item in value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+
+    return value
+
+
+def csv_chunks(chunks, fields):
+    """Encode chunks of row dicts as CSV, one string per chunk"""
+
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for rows in chunks:
+        yield "".join(
+            writer.writerow([csv_value(row[field]) for field in fields]) for row in rows
+        )
+
+
+def ndjson_chunks(chunks, fields):
+    """Encode chunks of row dicts as newline delimited JSON"""
+
+    encoder = DjangoJSONEncoder()
+    for rows in chunks:
+        yield "".join(
+            encoder.encode({field: row[field] for field in fields}) + "\n"
+            for row in rows
+        )
+
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", csv_chunks),
+    "ndjson": ("application/x-ndjson", ndjson_chunks),
+}
@@ -0,0 +1,46 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+
+
+class BulkManyRelatedField(serializers.ManyRelatedField):
+    """Many related field resolving every submitted key in one query"""
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, "__iter__"):
+            self.fail("not_a_list", input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail("empty")
+
+        child = self.child_relation
+        queryset = child.get_queryset()
+        pk_field = queryset.model._meta.pk
+
+        keys = []
+        for value in data:
+            try:
+                if isinstance(value, bool):
+                    raise TypeError
+                keys.append(pk_field.to_python(value))
+            except (TypeError, DjangoValidationError):
+                child.fail("incorrect_type", data_type=type(value).__name__)
+
+        objects = queryset.in_bulk(keys)
+        for key in keys:
+            if key not in objects:
+                child.fail("does_not_exist", pk_value=key)
+
+        return [objects[key] for key in keys]
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Primary key related field which, with `many=True`, validates in bulk"""
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {"child_relation": cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+
+        return BulkManyRelatedField(**list_kwargs)
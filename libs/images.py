@@ -0,0 +1,61 @@
+import logging
+from io import BytesIO
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, features
+
+logger = logging.getLogger(__name__)
+
+
+def get_formats(image):
+    """Formats the variants are encoded to
+
+    A JPEG, or PNG when the image has transparency, which every client can
+    show, plus a WebP when Pillow is built with WebP support.
+    """
+
+    formats = {"png": "PNG"} if image.mode == "RGBA" else {"jpg": "JPEG"}
+    if features.check("webp"):
+        formats["webp"] = "WEBP"
+    else:
+        logger.warning("Pillow has no WebP support, skipping WebP variants")
+
+    return formats
+
+
+def encode(image, format):
+    buffer = BytesIO()
+    image.save(buffer, format=format, quality=85, optimize=True)
+
+    return ContentFile(buffer.getvalue())
+
+
+def build_variants(field, sizes):
+    """Write square, EXIF-free variants of an image to its field's storage
+
+    Returns their names as `{variant: {extension: name}}`. The storage
+    names files by content, so building them again stores nothing new.
+    Variants no record references are removed by `prune_media`.
+    """
+
+    with field.open("rb"):
+        image = Image.open(field)
+        image = ImageOps.exif_transpose(image)
+
+    has_alpha = image.mode in ("RGBA", "LA") or "transparency" in image.info
+    image = image.convert("RGBA" if has_alpha else "RGB")
+    image.info = {}
+    formats = get_formats(image)
+
+    variants = {}
+    for variant, size in sizes.items():
+        resized = ImageOps.fit(image, (size, size), Image.LANCZOS)
+        variants[variant] = {}
+        for extension, format in formats.items():
+            name = field.field.generate_filename(
+                field.instance, f"{variant}.{extension}"
+            )
+            variants[variant][extension] = field.storage.save(
+                name, encode(resized, format)
+            )
+
+    return variants
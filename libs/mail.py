@@ -0,0 +1,194 @@
+import json
+import logging
+import smtplib
+import time
+import uuid
+from contextlib import suppress
+from datetime import timedelta
+from functools import partial
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+import django_rq
+
+from .metrics import EMAILS
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_KEY = "mail:outbox"
+PROCESSING_KEY = "mail:outbox:processing"
+FLUSH_SCHEDULED_KEY = "mail:flush:scheduled"
+FLUSH_LOCK_KEY = "mail:flush:lock"
+FLUSH_LOCK_TIMEOUT = 5 * 60
+
+_connection = None
+
+
+def get_pooled_connection():
+    """Return the mail connection kept open for the life of the process
+
+    Run the worker with `rq.SimpleWorker` so jobs share the process, and
+    with it the authenticated TLS session.
+    """
+
+    global _connection
+    if _connection is None:
+        _connection = get_connection(fail_silently=False)
+
+    _connection.open()
+    return _connection
+
+
+def reset_connection():
+    global _connection
+    if _connection is not None:
+        with suppress(Exception):
+            _connection.close()
+    _connection = None
+
+
+def is_transient(error):
+    """4xx replies, dropped connections and network errors are retried"""
+
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return False
+
+    return isinstance(error, OSError)
+
+
+def deliver(messages, on_delivered=None):
+    """Send messages over the pooled connection
+
+    Transient failures are retried with exponential backoff on a fresh
+    connection, permanent ones are logged and the message dropped. Returns
+    the messages left unsent once `MAIL_MAX_RETRIES` is exhausted.
+    `on_delivered` is called with the index of each message sent or dropped.
+    """
+
+    for index, message in enumerate(messages):
+        for attempt in range(settings.MAIL_MAX_RETRIES + 1):
+            try:
+                get_pooled_connection().send_messages([message])
+                EMAILS.labels("sent").inc()
+                break
+            except Exception as error:
+                reset_connection()
+                if not is_transient(error):
+                    logger.error("Dropping email to %s: %s", message.to, error)
+                    EMAILS.labels("dropped").inc()
+                    break
+                if attempt == settings.MAIL_MAX_RETRIES:
+                    EMAILS.labels("deferred").inc(len(messages) - index)
+                    return messages[index:]
+
+                time.sleep(settings.MAIL_RETRY_BACKOFF * 2 ** attempt)
+
+        if on_delivered is not None:
+            on_delivered(index)
+
+    return []
+
+
+def serialize(message):
+    return json.dumps(
+        {
+            "subject": message.subject,
+            "body": message.body,
+            "from_email": message.from_email,
+            "to": message.to,
+            "content_subtype": message.content_subtype,
+            "alternatives": getattr(message, "alternatives", []),
+        }
+    )
+
+
+def deserialize(data):
+    data = json.loads(data)
+    message = EmailMultiAlternatives(
+        data["subject"], data["body"], data["from_email"], data["to"]
+    )
+    message.content_subtype = data["content_subtype"]
+    for content, mimetype in data["alternatives"]:
+        message.attach_alternative(content, mimetype)
+
+    return message
+
+
+def queue_email(message):
+    """Add a message to the outbox, flushed in batches by the worker
+
+    With `MAIL_OUTBOX` disabled, the message is delivered right away.
+    """
+
+    if not settings.MAIL_OUTBOX:
+        deliver([message])
+        return
+
+    redis = django_rq.get_connection(settings.MAIL_QUEUE)
+    redis.rpush(OUTBOX_KEY, serialize(message))
+    schedule_flush(redis, settings.MAIL_FLUSH_DELAY)
+
+
+def schedule_flush(redis, delay):
+    """Schedule a flush unless one is already pending"""
+
+    if redis.set(FLUSH_SCHEDULED_KEY, 1, nx=True, ex=delay + 60):
+        queue = django_rq.get_queue(settings.MAIL_QUEUE)
+        queue.enqueue_in(timedelta(seconds=delay), flush_outbox)
+
+
+def claim_batch(redis):
+    """Move the next batch from the outbox to the processing list at once"""
+
+    pipeline = redis.pipeline()
+    for _ in range(settings.MAIL_BATCH_SIZE):
+        pipeline.lmove(OUTBOX_KEY, PROCESSING_KEY, "LEFT", "RIGHT")
+
+    return [data for data in pipeline.execute() if data is not None]
+
+
+def requeue_processing(redis):
+    """Move the messages left in the processing list back to the outbox head"""
+
+    while redis.lmove(PROCESSING_KEY, OUTBOX_KEY, "RIGHT", "LEFT") is not None:
+        pass
+
+
+def flush_outbox():
+    """Send every queued message in batches over the pooled connection
+
+    A message leaves the processing list only once sent or dropped, so the
+    batch of a worker dying mid-flush is requeued by the next flush. The
+    lock keeps a flush from requeueing the batch of a running one.
+    """
+
+    redis = django_rq.get_connection(settings.MAIL_QUEUE)
+    redis.delete(FLUSH_SCHEDULED_KEY)
+
+    retry_delay = settings.MAIL_RETRY_BACKOFF * 2 ** (settings.MAIL_MAX_RETRIES + 1)
+    token = uuid.uuid4().hex
+    if not redis.set(FLUSH_LOCK_KEY, token, nx=True, ex=FLUSH_LOCK_TIMEOUT):
+        schedule_flush(redis, settings.MAIL_FLUSH_DELAY)
+        return
+
+    def remove(batch, index):
+        redis.lrem(PROCESSING_KEY, 1, batch[index])
+        redis.expire(FLUSH_LOCK_KEY, FLUSH_LOCK_TIMEOUT)
+
+    try:
+        requeue_processing(redis)
+        while True:
+            batch = claim_batch(redis)
+            if not batch:
+                return
+
+            messages = [deserialize(data) for data in batch]
+            if deliver(messages, partial(remove, batch)):
+                requeue_processing(redis)
+                schedule_flush(redis, retry_delay)
+                return
+    finally:
+        # Leave a lock which expired meanwhile to its new holder
+        if redis.get(FLUSH_LOCK_KEY) == token.encode():
+            redis.delete(FLUSH_LOCK_KEY)
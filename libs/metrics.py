@@ -0,0 +1,169 @@
+import logging
+import os
+import time
+from datetime import datetime, timezone
+import django_rq
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed, PermissionDenied
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+from prometheus_client.core import GaugeMetricFamily, REGISTRY
+
+from .middleware import HybridMiddleware
+from .timing import Timings, current_timings, instrument
+
+logger = logging.getLogger(__name__)
+
+REQUEST_LATENCY = Histogram(
+    "activo_request_duration_seconds",
+    "Time spent answering requests",
+    ["method", "route", "status"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+DB_QUERIES = Counter(
+    "activo_db_queries", "SQL queries run by requests", ["method", "route"]
+)
+LOGINS = Counter("activo_logins", "Login attempts", ["outcome"])
+EMAILS = Counter("activo_emails", "Emails handled by the worker", ["outcome"])
+DB_CONNECTIONS = Counter(
+    "activo_db_connections",
+    "Database connections opened or reused by a request",
+    ["outcome"],
+)
+
+
+class QueueCollector:
+    """Depth, oldest job age and failed jobs of the RQ queues, read at scrape"""
+
+    def collect(self):
+        depth = GaugeMetricFamily(
+            "activo_rq_queue_depth", "Jobs waiting in the queue", labels=["queue"]
+        )
+        age = GaugeMetricFamily(
+            "activo_rq_oldest_job_age_seconds",
+            "Time the oldest waiting job has been queued",
+            labels=["queue"],
+        )
+        failed = GaugeMetricFamily(
+            "activo_rq_failed_jobs", "Jobs in the failed registry", labels=["queue"]
+        )
+
+        for name in settings.RQ_QUEUES:
+            try:
+                queue = django_rq.get_queue(name)
+                depth.add_metric([name], queue.count)
+                age.add_metric([name], get_oldest_job_age(queue))
+                failed.add_metric([name], queue.failed_job_registry.count)
+            except Exception as error:
+                logger.warning("Could not read the %s queue: %s", name, error)
+
+        yield from (depth, age, failed)
+
+
+def get_oldest_job_age(queue):
+    job_ids = queue.get_job_ids(0, 0)
+    job = queue.fetch_job(job_ids[0]) if job_ids else None
+    if job is None or job.enqueued_at is None:
+        return 0.0
+
+    enqueued_at = job.enqueued_at
+    if enqueued_at.tzinfo is None:
+        enqueued_at = enqueued_at.replace(tzinfo=timezone.utc)
+
+    return (datetime.now(timezone.utc) - enqueued_at).total_seconds()
+
+
+def get_registry():
+    """Registry aggregating the metrics of every process
+
+    With PROMETHEUS_MULTIPROC_DIR set, each web and worker process writes
+    its samples to that shared directory and they are summed at scrape.
+    """
+
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        registry = REGISTRY
+    else:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+
+    return registry
+
+
+def metrics(request):
+    """Expose the metrics in the Prometheus text format"""
+
+    token = settings.METRICS_TOKEN
+    if token:
+        authorization = request.headers.get("Authorization", "")
+        if not constant_time_compare(authorization, f"Bearer {token}"):
+            raise PermissionDenied()
+    elif not settings.DEBUG:
+        # Served without a token only while debugging
+        raise PermissionDenied()
+
+    registry = get_registry()
+    queues = CollectorRegistry()
+    queues.register(QueueCollector())
+    output = generate_latest(registry) + generate_latest(queues)
+
+    return HttpResponse(output, content_type=CONTENT_TYPE_LATEST)
+
+
+class MetricsMiddleware(HybridMiddleware):
+    """Observe the latency and SQL query count of requests per route"""
+
+    def __init__(self, get_response):
+        if not settings.METRICS:
+            raise MiddlewareNotUsed()
+
+        super().__init__(get_response)
+
+    def handle(self, request):
+        start = time.perf_counter()
+        timings = current_timings.get()
+        if timings is not None:
+            response = self.get_response(request)
+        else:
+            # Count the queries unless RequestTimingMiddleware already does
+            timings = Timings()
+            token = current_timings.set(timings)
+            try:
+                with instrument():
+                    response = self.get_response(request)
+            finally:
+                current_timings.reset(token)
+
+        return self.observe(request, response, timings, start)
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        timings = current_timings.get()
+        if timings is not None:
+            response = await self.get_response(request)
+        else:
+            timings = Timings()
+            token = current_timings.set(timings)
+            try:
+                response = await self.get_response(request)
+            finally:
+                current_timings.reset(token)
+
+        return self.observe(request, response, timings, start)
+
+    def observe(self, request, response, timings, start):
+        match = request.resolver_match
+        route = match.route if match else "unmatched"
+        REQUEST_LATENCY.labels(request.method, route, response.status_code).observe(
+            time.perf_counter() - start
+        )
+        DB_QUERIES.labels(request.method, route).inc(timings.queries)
+
+        return response
@@ -0,0 +1,40 @@
+import asyncio
+
+try:
+    from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+except ImportError:  # asgiref < 3.6
+    from asyncio import iscoroutinefunction
+
+    def markcoroutinefunction(func):
+        func._is_coroutine = asyncio.coroutines._is_coroutine
+        return func
+
+
+class HybridMiddleware:
+    """Middleware running natively under both the WSGI and ASGI handlers
+
+    A sync-only middleware makes Django's ASGI handler run the whole chain
+    in the single thread of `sync_to_async(thread_sensitive=True)`, so
+    requests are served one at a time. Subclasses implement `__call__`
+    and `__acall__`, the one matching `get_response` is used.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+
+        return self.handle(request)
+
+    def handle(self, request):
+        raise NotImplementedError
+
+    async def __acall__(self, request):
+        raise NotImplementedError
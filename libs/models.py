@@ -1,3 +1,4 @@
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 
 
@@ -9,3 +10,30 @@ class TimeStampModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class TrigramIndex(GinIndex):
+    """Trigram index serving `ILIKE '%term%'` and similarity on a text column
+
+    It needs the pg_trgm extension and is left out on other databases.
+    """
+
+    def __init__(self, *, fields, name):
+        super().__init__(
+            fields=fields, name=name, opclasses=["gin_trgm_ops"] * len(fields)
+        )
+
+    def deconstruct(self):
+        path, args, kwargs = super().deconstruct()
+        kwargs.pop("opclasses")
+        return path, args, kwargs
+
+    def create_sql(self, model, schema_editor, using="", **kwargs):
+        if schema_editor.connection.vendor != "postgresql":
+            return ""
+        return super().create_sql(model, schema_editor, using=using, **kwargs)
+
+    def remove_sql(self, model, schema_editor, **kwargs):
+        if schema_editor.connection.vendor != "postgresql":
+            return ""
+        return super().remove_sql(model, schema_editor, **kwargs)
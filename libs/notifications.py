@@ -0,0 +1,47 @@
+from functools import lru_cache
+from django.core.mail import EmailMultiAlternatives
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+from .mail import queue_email
+
+
+@lru_cache(maxsize=None)
+def get_compiled_template(name):
+    """Load and compile a template once per process"""
+
+    return get_template(name)
+
+
+@lru_cache(maxsize=None)
+def get_stylesheet(name):
+    """Read a stylesheet once per process, to be inlined in HTML emails"""
+
+    return mark_safe(get_compiled_template(name).render())
+
+
+class Notification:
+    """Multipart email rendered from `<name>.txt` and `<name>.html`
+
+    Meant to be rendered by worker jobs; the HTML template gets the shared
+    stylesheet as `stylesheet`.
+    """
+
+    stylesheet = "email.css"
+
+    def __init__(self, subject, template_name):
+        self.subject = subject
+        self.template_name = template_name
+
+    def render(self, context, to):
+        context = {**context, "stylesheet": get_stylesheet(self.stylesheet)}
+        text = get_compiled_template(f"{self.template_name}.txt").render(context)
+        html = get_compiled_template(f"{self.template_name}.html").render(context)
+
+        message = EmailMultiAlternatives(self.subject, text, to=to)
+        message.attach_alternative(html, "text/html")
+
+        return message
+
+    def send(self, context, to):
+        queue_email(self.render(context, to))
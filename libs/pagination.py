@@ -0,0 +1,151 @@
+import json
+from collections import OrderedDict
+from django.db.models import Q
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+
+from .filters import SEARCH_RANK
+
+
+class KeysetPagination(pagination.CursorPagination):
+    """Keyset (seek) pagination over a composite, unique ordering
+
+    Unlike DRF's `CursorPagination`, the cursor stores the values of every
+    ordering field, so a page is always a single index range scan whatever
+    its depth and no offsets are ever needed. Ranked search results are
+    paged by (rank, id) instead. Totals are opt-in through `?count=true`
+    because counting a large table costs a full scan.
+    """
+
+    ordering = ("-created_at", "-id")
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    count_query_param = "count"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.count = queryset.count() if self.should_count(request) else None
+
+        self.cursor = self.decode_cursor(request)
+        reverse = bool(self.cursor and self.cursor.reverse)
+        ordering = self.reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+
+        position = self.decode_position(self.cursor)
+        if position is not None:
+            queryset = self.seek(queryset, ordering, position)
+
+        results = list(queryset[: self.page_size + 1])
+        self.page = results[: self.page_size]
+        has_following = len(results) > len(self.page)
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = True
+            self.has_previous = has_following
+        else:
+            self.has_next = has_following
+            self.has_previous = position is not None
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_ordering(self, request, queryset, view):
+        if SEARCH_RANK in queryset.query.annotations:
+            return ("-" + SEARCH_RANK, "-id")
+
+        return super().get_ordering(request, queryset, view)
+
+    def should_count(self, request):
+        value = request.query_params.get(self.count_query_param, "")
+        return value.lower() in ("1", "true", "yes")
+
+    def reverse_ordering(self, ordering):
+        return tuple(
+            field[1:] if field.startswith("-") else "-" + field for field in ordering
+        )
+
+    def seek(self, queryset, ordering, position):
+        """Filter the queryset to the rows strictly after `position`
+
+        The leading `lte`/`gte` bound gives the database an index range to
+        start from, the OR expansion then breaks ties on the trailing fields.
+        """
+
+        fields = [field.lstrip("-") for field in ordering]
+        lookups = ["lt" if field.startswith("-") else "gt" for field in ordering]
+
+        bound = "lte" if lookups[0] == "lt" else "gte"
+        queryset = queryset.filter(**{f"{fields[0]}__{bound}": position[0]})
+
+        condition = Q()
+        for index, (field, lookup) in enumerate(zip(fields, lookups)):
+            equal = {fields[i]: position[i] for i in range(index)}
+            condition |= Q(**equal, **{f"{field}__{lookup}": position[index]})
+
+        return queryset.filter(condition)
+
+    def decode_position(self, cursor):
+        if cursor is None or cursor.position is None:
+            return None
+
+        try:
+            position = json.loads(cursor.position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        return position
+
+    def _get_position_from_instance(self, instance, ordering):
+        position = []
+        for field in ordering:
+            field_name = field.lstrip("-")
+            if isinstance(instance, dict):
+                position.append(str(instance[field_name]))
+            else:
+                position.append(str(getattr(instance, field_name)))
+
+        return json.dumps(position)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+
+        position = self._get_position_from_instance(self.page[-1], self.ordering)
+        cursor = pagination.Cursor(offset=0, reverse=False, position=position)
+        return self.encode_cursor(cursor)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+
+        position = self._get_position_from_instance(self.page[0], self.ordering)
+        cursor = pagination.Cursor(offset=0, reverse=True, position=position)
+        return self.encode_cursor(cursor)
+
+    def get_paginated_response(self, data):
+        response = OrderedDict()
+        if self.count is not None:
+            response["count"] = self.count
+        response["next"] = self.get_next_link()
+        response["previous"] = self.get_previous_link()
+        response["results"] = data
+
+        return Response(response)
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"]["count"] = {"type": "integer"}
+
+        return response_schema
@@ -0,0 +1,23 @@
+import csv
+import codecs
+from django.conf import settings
+from rest_framework.parsers import BaseParser
+
+
+def read_csv(stream, encoding=None):
+    """Lazily read a CSV byte stream into dicts keyed by the header row"""
+
+    lines = codecs.iterdecode(stream, encoding or settings.DEFAULT_CHARSET)
+    return csv.DictReader(lines)
+
+
+class CSVParser(BaseParser):
+    """Parses CSV request bodies into a lazy iterator of row dicts"""
+
+    media_type = "text/csv"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+
+        return read_csv(stream, encoding)
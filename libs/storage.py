@@ -0,0 +1,56 @@
+import hashlib
+import os
+import posixpath
+import tempfile
+from django.core.files.storage import FileSystemStorage
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage naming files by the SHA-256 of their content
+
+    `profile_pictures/me.jpg` is stored as `profile_pictures/ab/abc….jpg`,
+    so identical files are stored once and a name never changes content.
+    Uploads are streamed to a temporary file while hashing, then moved in
+    place. Since a file may back several records, `delete` keeps it; run
+    `python manage.py prune_media` to remove files no longer referenced.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        directory, filename = posixpath.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        os.makedirs(self.path(directory), exist_ok=True)
+
+        digest = hashlib.sha256()
+        fd, temporary_path = tempfile.mkstemp(dir=self.path(directory))
+        try:
+            with os.fdopen(fd, "wb") as temporary_file:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temporary_file.write(chunk)
+
+            checksum = digest.hexdigest()
+            name = posixpath.join(directory, checksum[:2], checksum + extension)
+            path = self.path(name)
+            if os.path.exists(path):
+                os.remove(temporary_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.chmod(temporary_path, self.file_permissions_mode or 0o644)
+                os.replace(temporary_path, path)
+        except BaseException:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            raise
+
+        return name
+
+    def delete(self, name):
+        pass
+
+    def prune(self, name):
+        """Delete a file, once nothing references it any more"""
+
+        super().delete(name)
@@ -0,0 +1,178 @@
+import contextvars
+import json
+import logging
+import random
+import time
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from .middleware import HybridMiddleware
+
+logger = logging.getLogger(__name__)
+
+current_timings = contextvars.ContextVar("current_timings", default=None)
+
+
+class Timings:
+    """Time spent by one request in SQL, the cache and named spans
+
+    It is installed as an execute wrapper on the connections the request
+    uses. The statements themselves are only kept for sampled requests.
+    """
+
+    def __init__(self, sample=False):
+        self.start = time.perf_counter()
+        self.spans = defaultdict(float)
+        self.queries = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.statements = [] if sample else None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.queries += 1
+            self.spans["db"] += duration
+            if self.statements is not None:
+                self.statements.append({"sql": sql, "ms": round(duration * 1000, 2)})
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def as_header(self, total):
+        metrics = []
+        for name, duration in self.spans.items():
+            metric = f"{name};dur={duration * 1000:.1f}"
+            if name == "db":
+                metric += f';desc="{self.queries} queries"'
+            metrics.append(metric)
+        if self.cache_hits or self.cache_misses:
+            metrics.append(
+                f'cache;desc="{self.cache_hits} hits, {self.cache_misses} misses"'
+            )
+        metrics.append(f"total;dur={total * 1000:.1f}")
+
+        return ", ".join(metrics)
+
+    def as_dict(self, total):
+        return {
+            "total_ms": round(total * 1000, 1),
+            "queries": self.queries,
+            **{
+                f"{name}_ms": round(value * 1000, 1)
+                for name, value in self.spans.items()
+            },
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+        }
+
+
+@contextmanager
+def span(name):
+    """Time a block of the current request under `name`"""
+
+    timings = current_timings.get()
+    if timings is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.spans[name] += time.perf_counter() - start
+
+
+def record_cache(hits=0, misses=0):
+    timings = current_timings.get()
+    if timings is not None:
+        timings.cache_hits += hits
+        timings.cache_misses += misses
+
+
+@contextmanager
+def instrument():
+    """Time the queries this thread runs for the current request"""
+
+    timings = current_timings.get()
+    if timings is None:
+        yield
+        return
+
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(timings))
+        yield
+
+
+class RequestTimingMiddleware(HybridMiddleware):
+    """Report where each request spends its time
+
+    Responses get a `Server-Timing` header and a structured log line is
+    written per request. Requests slower than REQUEST_TIMING_SLOW_MS are
+    logged as warnings, with their SQL statements for the
+    REQUEST_TIMING_SAMPLE_RATE share of requests that record them.
+
+    Under ASGI the queries are timed by the pool threads of the async
+    views, see `libs.asgi.run_view`.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_TIMING:
+            raise MiddlewareNotUsed()
+
+        super().__init__(get_response)
+
+    def start(self):
+        sample = random.random() < settings.REQUEST_TIMING_SAMPLE_RATE
+        return Timings(sample=sample)
+
+    def handle(self, request):
+        timings = self.start()
+        token = current_timings.set(timings)
+        try:
+            with instrument():
+                response = self.get_response(request)
+        finally:
+            current_timings.reset(token)
+
+        return self.finish(request, response, timings)
+
+    async def __acall__(self, request):
+        timings = self.start()
+        token = current_timings.set(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timings.reset(token)
+
+        return self.finish(request, response, timings)
+
+    def finish(self, request, response, timings):
+        total = timings.elapsed()
+        response["Server-Timing"] = timings.as_header(total)
+        self.log(request, response, timings, total)
+
+        return response
+
+    def log(self, request, response, timings, total):
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            **timings.as_dict(total),
+        }
+
+        if total * 1000 < settings.REQUEST_TIMING_SLOW_MS:
+            logger.info(json.dumps(record))
+            return
+
+        if timings.statements is not None:
+            record["statements"] = timings.statements
+        logger.warning(json.dumps(record))
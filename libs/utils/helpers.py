@@ -1,15 +1,62 @@
+from contextlib import contextmanager
 from rest_framework import serializers
-from django.core.mail import EmailMessage
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from django.utils.html import strip_tags
 
 
-def check_unique_value(model, field, value, errors):
-    kwargs = {field: value}
-    if model.objects.filter(**kwargs).exists():
-        raise serializers.ValidationError(errors[field]["unique"])
+def find_taken_values(model, rows, fields, exclude=None, batch_size=500):
+    """Return, per unique field, the submitted values already stored"""
 
+    taken = {field: set() for field in fields}
 
-def send_email(subject, message, to):
-    email_message = EmailMessage(subject, message, to=to)
-    email_message.content_subtype = "html"
-    email_message.send()
+    for start in range(0, len(rows), batch_size):
+        end = start + batch_size
+        batch = rows[start:end]
+        submitted = {
+            field: {row[field] for row in batch if row.get(field)} for field in fields
+        }
+
+        query = Q()
+        for field, values in submitted.items():
+            if values:
+                query |= Q(**{f"{field}__in": values})
+        if not query:
+            continue
+
+        queryset = model.objects.filter(query)
+        if exclude is not None:
+            queryset = queryset.exclude(pk=exclude.pk)
+
+        for stored in queryset.values_list(*fields):
+            for field, value in zip(fields, stored):
+                if value in submitted[field]:
+                    taken[field].add(value)
+
+    return taken
+
+
+def find_violated_field(model, fields, error):
+    """Return the unique field an IntegrityError was raised for, if any"""
+
+    message = str(error)
+    for field in fields:
+        column = model._meta.get_field(field).column
+        if f"{model._meta.db_table}.{column}" in message or f"({column})=" in message:
+            return field
+
+    return None
+
+
+@contextmanager
+def unique_violations_as_errors(model, fields, errors):
+    """Report unique constraint violations as serializer validation errors"""
+
+    try:
+        with transaction.atomic():
+            yield
+    except IntegrityError as error:
+        field = find_violated_field(model, fields, error)
+        if field is None:
+            raise
+        raise serializers.ValidationError({field: [errors[field]["unique"]]})
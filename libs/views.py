@@ -0,0 +1,157 @@
+import hashlib
+import mimetypes
+import os
+import re
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    StreamingHttpResponse,
+)
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_etags, quote_etag
+
+from .storage import ContentAddressedStorage
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class ConditionalGetMixin:
+    """Conditional GET support for API views
+
+    `get_validators` returns the parts of a strong ETag and, optionally, the
+    last modification time of the representation. Requests whose
+    `If-None-Match` or `If-Modified-Since` still match are answered with
+    304 Not Modified before anything is serialized.
+    """
+
+    def get_validators(self, request):
+        raise NotImplementedError("`get_validators()` must be implemented.")
+
+    def make_etag(self, request, *parts):
+        value = ":".join(
+            str(part) for part in [request.build_absolute_uri("/"), *parts]
+        )
+        return quote_etag(hashlib.md5(value.encode()).hexdigest())
+
+    def conditional_get(self, request, render):
+        parts, last_modified = self.get_validators(request)
+        etag = self.make_etag(request, *parts)
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = render()
+
+        response["ETag"] = etag
+        if timestamp is not None:
+            response["Last-Modified"] = http_date(timestamp)
+        patch_cache_control(response, private=True, no_cache=True)
+
+        return response
+
+
+def read_range(path, start, length, chunk_size=64 * 1024):
+    with open(path, "rb") as media_file:
+        media_file.seek(start)
+        while length > 0:
+            chunk = media_file.read(min(chunk_size, length))
+            if not chunk:
+                return
+            length -= len(chunk)
+            yield chunk
+
+
+def parse_range(header, size):
+    """Return the (start, end) of a single byte range, None if unsatisfiable"""
+
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+
+    start, end = match.groups()
+    if start == "":
+        start, end = max(size - int(end), 0), size - 1
+    else:
+        start, end = int(start), (min(int(end), size - 1) if end else size - 1)
+
+    return (start, end) if start <= end else None
+
+
+def serve_media(request, path):
+    """Serve a media file with validators, caching and Range support
+
+    Content-addressed files never change, so they are cached for a year.
+    With `MEDIA_SENDFILE` set, the body is handed off to the web server
+    through `X-Accel-Redirect` (nginx) or `X-Sendfile` (Apache, lighttpd).
+    """
+
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404()
+    if not os.path.isfile(full_path):
+        raise Http404()
+
+    stat = os.stat(full_path)
+    etag = quote_etag(f"{stat.st_size:x}-{int(stat.st_mtime):x}")
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(stat.st_mtime)
+    )
+    if response is None:
+        response = media_response(request, path, full_path, stat.st_size, etag)
+
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(stat.st_mtime)
+    if isinstance(default_storage, ContentAddressedStorage):
+        response["Cache-Control"] = "public, max-age=31536000, immutable"
+    else:
+        patch_cache_control(response, public=True, max_age=settings.MEDIA_CACHE_TIMEOUT)
+
+    return response
+
+
+def media_response(request, path, full_path, size, etag):
+    content_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+
+    if settings.MEDIA_SENDFILE == "x-accel-redirect":
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = settings.MEDIA_ACCEL_PREFIX + path
+        return response
+
+    if settings.MEDIA_SENDFILE == "x-sendfile":
+        response = HttpResponse(content_type=content_type)
+        response["X-Sendfile"] = full_path
+        return response
+
+    header = request.META.get("HTTP_RANGE")
+    if_range = request.META.get("HTTP_IF_RANGE")
+    if header and if_range and etag not in parse_etags(if_range):
+        header = None
+
+    if not header:
+        response = FileResponse(open(full_path, "rb"), content_type=content_type)
+        response["Accept-Ranges"] = "bytes"
+        return response
+
+    byte_range = parse_range(header, size)
+    if byte_range is None:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    start, end = byte_range
+    response = StreamingHttpResponse(
+        read_range(full_path, start, end - start + 1),
+        status=206,
+        content_type=content_type,
+    )
+    response["Content-Length"] = str(end - start + 1)
+    response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    response["Accept-Ranges"] = "bytes"
+
+    return response
@@ -0,0 +1,129 @@
+import asyncio
+import json
+import threading
+import time
+import pytest
+from asgiref.sync import async_to_sync
+from channels.testing import HttpCommunicator
+from django.http import HttpResponse, StreamingHttpResponse
+from django.urls import path
+from rest_framework.test import APIRequestFactory
+
+from activo.routing import application
+from apps.users.models import User
+from apps.users.views import CustomTokenObtainPairView
+from libs.asgi import ASGIHandler, as_async_view, get_executor
+from tests.constants import JSON_CONTENT_TYPE
+
+intervals = []
+
+
+def slow_view(request):
+    start = time.perf_counter()
+    time.sleep(0.5)
+    intervals.append((start, time.perf_counter()))
+    return HttpResponse("ok")
+
+
+urlpatterns = [path("slow/", as_async_view(slow_view))]
+
+
+@pytest.mark.django_db(transaction=True)
+class TestAsyncViews:
+    """Test the async variants of the sync views"""
+
+    def test_async_view_runs_in_the_bounded_pool(self, settings):
+        threads = []
+
+        def view(request):
+            threads.append(threading.current_thread().name)
+            return HttpResponse("ok")
+
+        response = async_to_sync(as_async_view(view))(APIRequestFactory().get("/"))
+
+        assert response.content == b"ok"
+        assert threads[0].startswith("async-view")
+        assert get_executor()._max_workers == settings.ASYNC_VIEW_THREADS
+
+    def test_async_login_succeeds(self):
+        user = User.objects.create_user(
+            first_name="user",
+            last_name="new",
+            email="user@app.com",
+            phone_number="+250780000000",
+            id_number="111111111111",
+            password="password",
+        )
+        view = as_async_view(CustomTokenObtainPairView.as_view())
+        request = APIRequestFactory().post(
+            "/users/login/?include=user",
+            data=json.dumps({"email": user.email, "password": "password"}),
+            content_type=JSON_CONTENT_TYPE,
+        )
+
+        response = async_to_sync(view)(request)
+
+        assert response.status_code == 200
+        assert json.loads(response.content)["user"]["email"] == user.email
+
+    def test_async_view_keeps_view_attributes(self):
+        view = CustomTokenObtainPairView.as_view()
+        async_view = as_async_view(view)
+
+        assert async_view.cls is CustomTokenObtainPairView
+        assert async_view.csrf_exempt
+
+
+@pytest.mark.django_db(transaction=True)
+class TestASGIApplication:
+    """Test HTTP requests served through the ASGI application"""
+
+    def test_http_is_routed_to_django(self):
+        communicator = HttpCommunicator(application, "GET", "/users/")
+
+        response = async_to_sync(communicator.get_response)()
+
+        assert response["status"] == 401
+
+    def test_streaming_response_is_consumed_off_the_event_loop(self):
+        threads, messages = [], []
+
+        def content():
+            for part in ("a", "b"):
+                threads.append(threading.current_thread().name)
+                yield part
+
+        async def send(message):
+            messages.append(message)
+
+        response = StreamingHttpResponse(content())
+        async_to_sync(ASGIHandler().send_response)(response, send)
+
+        assert b"".join(message.get("body", b"") for message in messages) == b"ab"
+        assert all(name.startswith("asgi-stream") for name in threads)
+
+    def test_concurrent_requests_overlap_through_the_middleware(self, settings):
+        handler = application.application_mapping["http"]
+        loaded = dict(handler.__dict__)
+        settings.REQUEST_TIMING = True
+        settings.METRICS = True
+        settings.ROOT_URLCONF = __name__
+        handler.load_middleware(is_async=True)
+        intervals.clear()
+
+        async def get_responses():
+            communicators = [
+                HttpCommunicator(application, "GET", "/slow/") for _ in range(4)
+            ]
+            return await asyncio.gather(
+                *(communicator.get_response() for communicator in communicators)
+            )
+
+        try:
+            responses = async_to_sync(get_responses)()
+        finally:
+            handler.__dict__.update(loaded)
+
+        assert [response["status"] for response in responses] == [200] * 4
+        assert all(b"Server-Timing" in dict(r["headers"]) for r in responses)
+        assert max(start for start, _ in intervals) < min(end for _, end in intervals)
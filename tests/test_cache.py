@@ -0,0 +1,115 @@
+import pytest
+from io import StringIO
+from unittest import mock
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.core.management import call_command
+
+from libs.cache import CacheNamespace, cached
+
+
+@pytest.fixture
+def namespace():
+    return CacheNamespace("tests:namespace", timeout=60)
+
+
+class TestCacheNamespace:
+    """Test the caching toolkit"""
+
+    def test_invalidate_makes_entries_unreachable(self, namespace):
+        namespace.set(1, "value")
+        namespace.invalidate()
+
+        assert namespace.get(1) is None
+
+    def test_get_many_records_hits_and_misses(self, namespace):
+        namespace.set_many({1: "one", (2, "b"): "two"})
+
+        values = namespace.get_many([1, (2, "b"), 3])
+
+        assert values == {(1,): "one", (2, "b"): "two"}
+        assert namespace.get_stats() == {"hits": 2, "misses": 1}
+
+    def test_get_or_set_computes_once(self, namespace):
+        compute = mock.Mock(return_value="value")
+
+        assert namespace.get_or_set(1, compute) == "value"
+        assert namespace.get_or_set(1, compute) == "value"
+        assert compute.call_count == 1
+        assert namespace.get_stats() == {"hits": 1, "misses": 1}
+
+    def test_get_or_set_refreshes_early_entries(self, namespace):
+        namespace.get_or_set(1, lambda: "old")
+        key = namespace.key(1)
+        value, expires_at, _ = cache.get(key)
+        cache.set(key, (value, expires_at, 120), 60)
+
+        with mock.patch("libs.cache.random.random", return_value=0.99):
+            assert namespace.get_or_set(1, lambda: "new") == "new"
+
+    def test_get_or_set_serves_stale_value_while_locked(self, namespace):
+        namespace.get_or_set(1, lambda: "old")
+        key = namespace.key(1)
+        value, expires_at, _ = cache.get(key)
+        cache.set(key, (value, expires_at, 120), 60)
+        cache.add(f"{key}:lock", 1)
+
+        with mock.patch("libs.cache.random.random", return_value=0.99):
+            assert namespace.get_or_set(1, lambda: "new") == "old"
+
+    def test_get_or_set_waits_for_the_lock_holder(self, namespace):
+        key = namespace.key(1)
+        cache.add(f"{key}:lock", 1)
+
+        def sleep(seconds):
+            cache.set(key, namespace.wrap("computed", 60), 60)
+
+        with mock.patch("libs.cache.time.sleep", side_effect=sleep):
+            value = namespace.get_or_set(1, lambda: "new")
+
+        assert value == "computed"
+
+    def test_get_or_set_keeps_a_lock_it_did_not_acquire(self, namespace):
+        key = namespace.key(1)
+        cache.add(f"{key}:lock", "holder")
+
+        with mock.patch("libs.cache.time.sleep"):
+            assert namespace.get_or_set(1, lambda: "new") == "new"
+
+        assert cache.get(f"{key}:lock") == "holder"
+
+    def test_record_increments_stats_once_per_event(self, namespace):
+        namespace.get(1)
+
+        with mock.patch.object(cache, "add", wraps=cache.add) as add:
+            namespace.get(1)
+            namespace.get(2)
+
+        add.assert_not_called()
+        assert namespace.get_stats() == {"hits": 0, "misses": 3}
+
+    @pytest.mark.django_db
+    def test_cached_evaluates_querysets(self, namespace):
+        Group.objects.create(name="admins")
+
+        @cached(namespace)
+        def groups(name):
+            return Group.objects.filter(name=name)
+
+        first = groups("admins")
+        Group.objects.all().delete()
+
+        assert [group.name for group in first] == ["admins"]
+        assert [group.name for group in groups("admins")] == ["admins"]
+
+        groups.invalidate()
+        assert groups("admins") == []
+
+    def test_cache_stats_command(self, namespace):
+        namespace.get(1)
+        out = StringIO()
+
+        call_command("user_cache_stats", "--reset", stdout=out)
+
+        assert "tests:namespace" in out.getvalue()
+        assert namespace.get_stats() == {"hits": 0, "misses": 0}
@@ -0,0 +1,52 @@
+import pytest
+from django.db import connection
+
+from libs.db.postgresql.base import DatabaseWrapper, get_connection_stats
+
+pytestmark = pytest.mark.skipif(
+    connection.vendor != "postgresql", reason="PostgreSQL backend"
+)
+
+
+@pytest.fixture
+def wrapper():
+    wrapper = DatabaseWrapper(
+        {**connection.settings_dict, "CONN_MAX_AGE": None, "CONN_HEALTH_CHECKS": True},
+        alias=connection.alias,
+    )
+    yield wrapper
+    wrapper.close()
+
+
+def start_request(wrapper):
+    wrapper.close_if_unusable_or_obsolete()
+
+
+@pytest.mark.django_db
+class TestDatabaseWrapper:
+    """Test the PostgreSQL backend with health checks"""
+
+    def test_persistent_connection_is_reused(self, wrapper):
+        wrapper.ensure_connection()
+        first = wrapper.connection
+        before = get_connection_stats()
+
+        start_request(wrapper)
+        wrapper.ensure_connection()
+
+        assert wrapper.connection is first
+        assert get_connection_stats()["reuses"] == before["reuses"] + 1
+        assert get_connection_stats()["connections"] == before["connections"]
+
+    def test_dropped_connection_is_replaced(self, wrapper):
+        wrapper.ensure_connection()
+        with wrapper.cursor() as cursor:
+            cursor.execute("SELECT pg_backend_pid()")
+            pid = cursor.fetchone()[0]
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_terminate_backend(%s)", [pid])
+
+        start_request(wrapper)
+        with wrapper.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            assert cursor.fetchone() == (1,)
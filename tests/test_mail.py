@@ -0,0 +1,230 @@
+import smtplib
+from collections import defaultdict
+import pytest
+from unittest.mock import MagicMock, patch
+from django.core import mail
+from django.core.mail import EmailMessage, EmailMultiAlternatives
+from prometheus_client import REGISTRY
+
+from libs import mail as pooled_mail
+
+
+@pytest.fixture(autouse=True)
+def pooled_connection(settings):
+    settings.MAIL_RETRY_BACKOFF = 0
+    pooled_mail.reset_connection()
+    yield
+    pooled_mail.reset_connection()
+
+
+def make_message(to="user@app.com"):
+    return EmailMessage("New Account", "<p>Welcome</p>", to=[to])
+
+
+class FakeRedis:
+    """The Redis commands the outbox uses, kept in memory"""
+
+    def __init__(self):
+        self.values = {}
+        self.lists = defaultdict(list)
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value.encode() if isinstance(value, str) else value
+        return True
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def delete(self, key):
+        self.values.pop(key, None)
+
+    def expire(self, key, seconds):
+        return key in self.values
+
+    def rpush(self, key, *values):
+        self.lists[key].extend(values)
+
+    def lmove(self, source, destination, src, dest):
+        if not self.lists[source]:
+            return None
+        value = self.lists[source].pop(0 if src == "LEFT" else -1)
+        self.lists[destination].insert(
+            0 if dest == "LEFT" else len(self.lists[destination]), value
+        )
+        return value
+
+    def lrem(self, key, count, value):
+        self.lists[key].remove(value)
+
+    def pipeline(self):
+        redis, calls = self, []
+
+        class Pipeline:
+            def __getattr__(self, name):
+                return lambda *args: calls.append((name, args))
+
+            def execute(self):
+                return [getattr(redis, name)(*args) for name, args in calls]
+
+        return Pipeline()
+
+
+class TestDeliver:
+    """Test pooled email delivery"""
+
+    def test_deliver_reuses_one_connection(self):
+        connection = MagicMock()
+        with patch("libs.mail.get_connection", return_value=connection) as factory:
+            unsent = pooled_mail.deliver([make_message(), make_message()])
+            pooled_mail.deliver([make_message()])
+
+        assert unsent == []
+        factory.assert_called_once()
+        assert connection.send_messages.call_count == 3
+
+    def test_deliver_retries_transient_failures(self):
+        connection = MagicMock()
+        connection.send_messages.side_effect = [
+            smtplib.SMTPServerDisconnected("closed"),
+            smtplib.SMTPResponseException(421, "busy"),
+            1,
+        ]
+        with patch("libs.mail.get_connection", return_value=connection) as factory:
+            unsent = pooled_mail.deliver([make_message()])
+
+        assert unsent == []
+        assert factory.call_count == 3
+        assert connection.send_messages.call_count == 3
+
+    def test_deliver_drops_permanent_failures(self):
+        connection = MagicMock()
+        connection.send_messages.side_effect = [
+            smtplib.SMTPRecipientsRefused({"user@app.com": (550, b"unknown")}),
+            1,
+        ]
+        with patch("libs.mail.get_connection", return_value=connection):
+            unsent = pooled_mail.deliver([make_message(), make_message()])
+
+        assert unsent == []
+        assert connection.send_messages.call_count == 2
+
+    def test_deliver_returns_messages_left_after_retries(self, settings):
+        settings.MAIL_MAX_RETRIES = 1
+        messages = [make_message(), make_message("jane@app.com")]
+        connection = MagicMock()
+        connection.send_messages.side_effect = [1, OSError(), OSError()]
+        with patch("libs.mail.get_connection", return_value=connection):
+            unsent = pooled_mail.deliver(messages)
+
+        assert unsent == messages[1:]
+
+    def test_deliver_counts_emails_by_outcome(self):
+        def sample(outcome):
+            return REGISTRY.get_sample_value(
+                "activo_emails_total", {"outcome": outcome}
+            )
+
+        sent, dropped = sample("sent") or 0, sample("dropped") or 0
+        connection = MagicMock()
+        connection.send_messages.side_effect = [
+            smtplib.SMTPRecipientsRefused({"user@app.com": (550, b"unknown")}),
+            1,
+        ]
+        with patch("libs.mail.get_connection", return_value=connection):
+            pooled_mail.deliver([make_message(), make_message()])
+
+        assert sample("sent") == sent + 1
+        assert sample("dropped") == dropped + 1
+
+    def test_queue_email_without_outbox_sends_now(self, settings):
+        settings.MAIL_OUTBOX = False
+
+        pooled_mail.queue_email(make_message())
+
+        assert len(mail.outbox) == 1
+        assert mail.outbox[0].to == ["user@app.com"]
+
+    def test_serialized_message_round_trips(self):
+        message = EmailMultiAlternatives("Subject", "text", to=["user@app.com"])
+        message.attach_alternative("<p>html</p>", "text/html")
+
+        copy = pooled_mail.deserialize(pooled_mail.serialize(message))
+
+        assert copy.subject == "Subject"
+        assert copy.body == "text"
+        assert copy.to == ["user@app.com"]
+        assert copy.alternatives == [("<p>html</p>", "text/html")]
+
+
+class TestFlushOutbox:
+    """Test flushing the outbox"""
+
+    @pytest.fixture
+    def redis(self, settings):
+        settings.MAIL_OUTBOX = True
+        redis = FakeRedis()
+        with patch("libs.mail.django_rq") as django_rq:
+            django_rq.get_connection.return_value = redis
+            yield redis
+
+    def queue(self, *recipients):
+        for to in recipients:
+            pooled_mail.queue_email(make_message(to))
+
+    def recipients(self, connection):
+        return [call[0][0][0].to[0] for call in connection.send_messages.call_args_list]
+
+    def test_flush_outbox_sends_queued_messages(self, redis, settings):
+        settings.MAIL_BATCH_SIZE = 2
+        self.queue("a@app.com", "b@app.com", "c@app.com")
+        connection = MagicMock()
+        with patch("libs.mail.get_connection", return_value=connection):
+            pooled_mail.flush_outbox()
+
+        assert self.recipients(connection) == ["a@app.com", "b@app.com", "c@app.com"]
+        assert redis.lists[pooled_mail.OUTBOX_KEY] == []
+        assert redis.lists[pooled_mail.PROCESSING_KEY] == []
+        assert redis.get(pooled_mail.FLUSH_LOCK_KEY) is None
+
+    def test_flush_outbox_after_a_crash_sends_the_unsent_messages(self, redis):
+        self.queue("a@app.com", "b@app.com", "c@app.com")
+        crashed = MagicMock()
+        crashed.send_messages.side_effect = [1, SystemExit()]
+        with patch("libs.mail.get_connection", return_value=crashed):
+            with pytest.raises(SystemExit):
+                pooled_mail.flush_outbox()
+
+        connection = MagicMock()
+        pooled_mail.reset_connection()
+        with patch("libs.mail.get_connection", return_value=connection):
+            pooled_mail.flush_outbox()
+
+        assert self.recipients(crashed) == ["a@app.com", "b@app.com"]
+        assert self.recipients(connection) == ["b@app.com", "c@app.com"]
+        assert redis.lists[pooled_mail.PROCESSING_KEY] == []
+
+    def test_flush_outbox_requeues_deferred_messages(self, redis, settings):
+        settings.MAIL_MAX_RETRIES = 0
+        self.queue("a@app.com", "b@app.com")
+        connection = MagicMock()
+        connection.send_messages.side_effect = [1, OSError()]
+        with patch("libs.mail.get_connection", return_value=connection):
+            pooled_mail.flush_outbox()
+
+        outbox = redis.lists[pooled_mail.OUTBOX_KEY]
+        assert [pooled_mail.deserialize(data).to for data in outbox] == [["b@app.com"]]
+        assert redis.lists[pooled_mail.PROCESSING_KEY] == []
+
+    def test_flush_outbox_leaves_a_running_flush_alone(self, redis):
+        self.queue("a@app.com")
+        redis.rpush(pooled_mail.PROCESSING_KEY, pooled_mail.serialize(make_message()))
+        redis.set(pooled_mail.FLUSH_LOCK_KEY, "running")
+        connection = MagicMock()
+        with patch("libs.mail.get_connection", return_value=connection):
+            pooled_mail.flush_outbox()
+
+        connection.send_messages.assert_not_called()
+        assert len(redis.lists[pooled_mail.PROCESSING_KEY]) == 1
+        assert redis.get(pooled_mail.FLUSH_LOCK_KEY) == b"running"
@@ -0,0 +1,97 @@
+import os
+import pytest
+from django.core.files.base import ContentFile
+
+from libs.storage import ContentAddressedStorage
+
+
+@pytest.fixture
+def storage(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    return ContentAddressedStorage(location=str(tmp_path))
+
+
+class TestContentAddressedStorage:
+    """Test content addressed storage"""
+
+    def test_save_names_files_by_content(self, storage):
+        first = storage.save("profile_pictures/a.PNG", ContentFile(b"image"))
+        second = storage.save("profile_pictures/b.png", ContentFile(b"image"))
+        other = storage.save("profile_pictures/a.png", ContentFile(b"other"))
+
+        assert first == second
+        assert first != other
+        assert first.startswith("profile_pictures/")
+        assert first.endswith(".png")
+        assert storage.open(first).read() == b"image"
+        assert len(os.listdir(storage.path("profile_pictures"))) == 2
+
+    def test_delete_keeps_shared_files_until_pruned(self, storage):
+        name = storage.save("profile_pictures/a.png", ContentFile(b"image"))
+
+        storage.delete(name)
+        assert storage.exists(name)
+
+        storage.prune(name)
+        assert not storage.exists(name)
+
+
+class TestServeMedia:
+    """Test media serving"""
+
+    @pytest.fixture
+    def url(self, storage):
+        name = storage.save("profile_pictures/a.png", ContentFile(b"0123456789"))
+        return f"/media/{name}"
+
+    def test_serve_media_succeeds(self, api_client, url):
+        response = api_client.get(url)
+
+        assert response.status_code == 200
+        assert b"".join(response.streaming_content) == b"0123456789"
+        assert response["Content-Type"] == "image/png"
+        assert response["Cache-Control"] == "public, max-age=31536000, immutable"
+        assert response["Accept-Ranges"] == "bytes"
+
+    def test_serve_media_with_matching_etag_is_not_modified(self, api_client, url):
+        etag = api_client.get(url)["ETag"]
+
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 304
+
+    def test_serve_media_range_succeeds(self, api_client, url):
+        response = api_client.get(url, HTTP_RANGE="bytes=2-5")
+        suffix = api_client.get(url, HTTP_RANGE="bytes=-3")
+
+        assert response.status_code == 206
+        assert b"".join(response.streaming_content) == b"2345"
+        assert response["Content-Range"] == "bytes 2-5/10"
+        assert b"".join(suffix.streaming_content) == b"789"
+
+    def test_serve_media_unsatisfiable_range_fails(self, api_client, url):
+        response = api_client.get(url, HTTP_RANGE="bytes=20-")
+
+        assert response.status_code == 416
+        assert response["Content-Range"] == "bytes */10"
+
+    def test_serve_media_with_stale_if_range_sends_everything(self, api_client, url):
+        response = api_client.get(url, HTTP_RANGE="bytes=2-5", HTTP_IF_RANGE='"old"')
+
+        assert response.status_code == 200
+
+    def test_serve_media_with_x_accel_redirect(self, api_client, settings, url):
+        settings.MEDIA_SENDFILE = "x-accel-redirect"
+
+        response = api_client.get(url)
+
+        assert response.status_code == 200
+        assert response["X-Accel-Redirect"] == "/protected-media/" + url[7:]
+        assert not response.content
+
+    def test_serve_media_outside_media_root_fails(self, api_client, storage):
+        response = api_client.get("/media/../settings.py")
+        missing = api_client.get("/media/profile_pictures/missing.png")
+
+        assert response.status_code == 404
+        assert missing.status_code == 404
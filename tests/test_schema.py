@@ -0,0 +1,31 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestSchemaEndpoint:
+    """Test the precomputed OpenAPI schema endpoint"""
+
+    url = "/openapi.json"
+
+    def test_get_schema_succeeds(self, api_client):
+        response = api_client.get(self.url)
+
+        assert response.status_code == 200
+        assert response.json()["basePath"] == "/api"
+        assert "host" not in response.json()
+        assert "/users/" in response.json()["paths"]
+        assert "public" in response["Cache-Control"]
+        assert "max-age=3600" in response["Cache-Control"]
+
+    def test_get_schema_with_matching_etag_is_not_modified(self, api_client):
+        etag = api_client.get(self.url)["ETag"]
+
+        response = api_client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 304
+
+    def test_docs_ui_loads_the_precomputed_schema(self, api_client):
+        response = api_client.get("/", HTTP_ACCEPT="text/html")
+
+        assert response.status_code == 200
+        assert "/api/openapi.json" in response.content.decode()
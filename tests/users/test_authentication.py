@@ -0,0 +1,95 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import Permission
+from django.test import TestCase
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIRequestFactory
+
+from apps.users.authentication import (
+    StatelessJWTAuthentication,
+    StatelessUser,
+    auth_versions_cache,
+    get_current_auth_version,
+)
+from apps.users.permissions import get_permissions_version
+from apps.users.serializers import CustomTokenObtainPairSerializer
+
+
+@pytest.mark.django_db
+class TestStatelessJWTAuthentication:
+    """Test stateless JWT authentication"""
+
+    def authenticate(self, user):
+        token = CustomTokenObtainPairSerializer.get_token(user).access_token
+        request = APIRequestFactory().get(
+            "/users/", HTTP_AUTHORIZATION=f"Bearer {token}"
+        )
+
+        return StatelessJWTAuthentication().authenticate(request)
+
+    def test_authenticate_trusts_the_token_claims(self, new_user):
+        permission = Permission.objects.get(codename="view_user")
+        new_user.user_permissions.add(permission)
+        self.authenticate(new_user)
+
+        with CaptureQueriesContext(connection) as context:
+            user, _ = self.authenticate(new_user)
+
+        assert isinstance(user, StatelessUser)
+        assert user.id == new_user.id
+        assert user.has_perms(["users.view_user"])
+        assert not user.has_perm("users.delete_user")
+        assert len(context.captured_queries) == 0
+
+    def test_authenticate_loads_the_user_when_needed(self, new_user):
+        user, _ = self.authenticate(new_user)
+
+        assert user.email == new_user.email
+
+    def test_authenticate_after_password_change_fails(self, new_user):
+        token = CustomTokenObtainPairSerializer.get_token(new_user).access_token
+        new_user.set_password("new-password")
+        new_user.save()
+        request = APIRequestFactory().get(
+            "/users/", HTTP_AUTHORIZATION=f"Bearer {token}"
+        )
+
+        with pytest.raises(AuthenticationFailed):
+            StatelessJWTAuthentication().authenticate(request)
+
+    def test_authenticate_after_password_change_ignores_stale_cache(self, new_user):
+        token = CustomTokenObtainPairSerializer.get_token(new_user).access_token
+        version = get_current_auth_version(new_user.id)
+        with TestCase.captureOnCommitCallbacks(execute=True):
+            new_user.set_password("new-password")
+            new_user.save()
+            # A concurrent request caching the committed row before the commit
+            auth_versions_cache.set((get_permissions_version(), new_user.id), version)
+        request = APIRequestFactory().get(
+            "/users/", HTTP_AUTHORIZATION=f"Bearer {token}"
+        )
+
+        with pytest.raises(AuthenticationFailed):
+            StatelessJWTAuthentication().authenticate(request)
+
+    def test_authenticate_after_deactivation_fails(self, new_user):
+        token = CustomTokenObtainPairSerializer.get_token(new_user).access_token
+        new_user.is_active = False
+        new_user.save()
+        request = APIRequestFactory().get(
+            "/users/", HTTP_AUTHORIZATION=f"Bearer {token}"
+        )
+
+        with pytest.raises(AuthenticationFailed):
+            StatelessJWTAuthentication().authenticate(request)
+
+    def test_authenticate_after_permission_change_fails(self, new_user):
+        token = CustomTokenObtainPairSerializer.get_token(new_user).access_token
+        new_user.user_permissions.add(Permission.objects.get(codename="view_user"))
+        request = APIRequestFactory().get(
+            "/users/", HTTP_AUTHORIZATION=f"Bearer {token}"
+        )
+
+        with pytest.raises(AuthenticationFailed):
+            StatelessJWTAuthentication().authenticate(request)
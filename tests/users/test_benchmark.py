@@ -0,0 +1,74 @@
+import json
+import pytest
+from django.core.management import CommandError, call_command
+
+from apps.users.models import User
+from libs.benchmarks import find_regressions, percentile
+
+ENDPOINTS = ["list", "detail", "create", "login"]
+
+
+def test_percentile_interpolates_between_values():
+    assert percentile([4, 1, 3, 2], 0.5) == 2.5
+    assert percentile([1, 2, 3, 4], 1) == 4
+
+
+def test_find_regressions_reports_worse_metrics():
+    baseline = {"list": {"p95_ms": 10, "throughput": 100}}
+    results = {"list": {"p95_ms": 13, "throughput": 90}}
+
+    assert find_regressions(results, baseline, 0.2) == ["list p95_ms: 10 -> 13 (+30%)"]
+    assert find_regressions(results, baseline, 0.5) == []
+
+
+@pytest.mark.django_db
+class TestBenchmarkUsersCommand:
+    """Test the user API benchmark command"""
+
+    def run(self, *args):
+        call_command("benchmark_users", "--size", "30", "--requests", "3", *args)
+
+    def test_benchmark_users_requires_benchmark_settings(self):
+        with pytest.raises(CommandError):
+            self.run()
+
+    def test_benchmark_users_writes_results(self, settings, tmp_path):
+        settings.BENCHMARK = True
+        output = tmp_path / "results.json"
+
+        self.run("--output", str(output))
+        results = json.loads(output.read_text())
+
+        assert results["size"] == 30
+        assert sorted(results["endpoints"]) == sorted(ENDPOINTS)
+        assert results["endpoints"]["list"]["requests"] == 3
+        assert User.objects.filter(email__startswith="user").count() == 30
+
+    def test_benchmark_users_fails_on_regression(self, settings, tmp_path):
+        settings.BENCHMARK = True
+        baseline = tmp_path / "baseline.json"
+        baseline.write_text(
+            json.dumps({"endpoints": {name: {"p95_ms": 0.001} for name in ENDPOINTS}})
+        )
+
+        with pytest.raises(CommandError, match="Regressions"):
+            self.run(
+                "--output", str(tmp_path / "results.json"), "--baseline", str(baseline)
+            )
+
+
+@pytest.mark.django_db
+class TestBenchmarkLoginCommand:
+    """Test the login benchmark command"""
+
+    def test_benchmark_login_requires_benchmark_settings(self):
+        with pytest.raises(CommandError):
+            call_command("benchmark_login", "--requests", "1")
+
+    def test_benchmark_login_reports_rates(self, settings, capsys):
+        settings.BENCHMARK = True
+
+        call_command("benchmark_login", "--requests", "1")
+
+        assert "logins/s" in capsys.readouterr().out
+        assert not User.objects.filter(email="benchmark@app.com").exists()
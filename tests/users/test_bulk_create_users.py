@@ -0,0 +1,170 @@
+import pytest
+import json
+from unittest.mock import patch
+from django.contrib.auth.models import Permission
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from apps.users.error_messages import errors
+from apps.users.models import User
+from apps.users.tasks import activate_accounts
+from tests.constants import JSON_CONTENT_TYPE
+
+
+@pytest.mark.django_db
+class TestBulkCreateUsersEndpoint:
+    """Test bulk create users endpoint"""
+
+    url = "/users/bulk/"
+    rows = [
+        {
+            "first_name": "First",
+            "last_name": "User",
+            "email": "first.user@app.com",
+            "phone_number": "+250780000001",
+            "id_number": "1111111111",
+        },
+        {
+            "first_name": "Second",
+            "last_name": "User",
+            "email": "second.user@app.com",
+            "phone_number": "+250780000002",
+            "id_number": "2222222222",
+        },
+    ]
+
+    @pytest.fixture
+    def authorized(self, api_client, auth):
+        permission = Permission.objects.get(codename="add_user")
+        auth["user"].user_permissions.add(permission)
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth['token']}")
+        return api_client
+
+    def test_bulk_create_users_without_add_permission_fails(self, api_client, auth):
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth['token']}")
+
+        data = json.dumps(self.rows)
+        response = api_client.post(self.url, data=data, content_type=JSON_CONTENT_TYPE)
+
+        assert response.status_code == 403
+
+    def test_bulk_create_users_from_json_succeeds(self, authorized, new_group):
+        rows = [dict(row, groups=[new_group.id]) for row in self.rows]
+
+        data = json.dumps(rows)
+        response = authorized.post(self.url, data=data, content_type=JSON_CONTENT_TYPE)
+
+        assert response.status_code == 201
+        assert response.json()["created"] == 2
+        assert response.json()["failed"] == 0
+        assert [result["status"] for result in response.json()["results"]] == [
+            "created",
+            "created",
+        ]
+        user = User.objects.get(email="second.user@app.com")
+        assert user.should_set_password is True
+        assert list(user.groups.all()) == [new_group]
+
+    def test_bulk_create_users_from_csv_succeeds(self, authorized, new_group):
+        header = "first_name,last_name,email,phone_number,id_number,groups\n"
+        lines = [
+            f"{row['first_name']},{row['last_name']},{row['email']},"
+            f"{row['phone_number']},{row['id_number']},{new_group.id}\n"
+            for row in self.rows
+        ]
+        upload = SimpleUploadedFile(
+            "users.csv", (header + "".join(lines)).encode(), content_type="text/csv"
+        )
+
+        response = authorized.post(self.url, data={"file": upload})
+
+        assert response.status_code == 201
+        assert response.json()["created"] == 2
+        assert User.objects.filter(groups=new_group).count() == 2
+
+    def test_bulk_create_users_ignores_privilege_flags(self, authorized, new_group):
+        rows = [
+            dict(row, groups=[new_group.id], is_superuser=True, is_staff=True)
+            for row in self.rows
+        ]
+
+        data = json.dumps(rows)
+        response = authorized.post(self.url, data=data, content_type=JSON_CONTENT_TYPE)
+
+        assert response.status_code == 201
+        assert not User.objects.filter(is_superuser=True).exists()
+        assert not User.objects.filter(is_staff=True).exists()
+
+    def test_bulk_create_users_from_csv_ignores_privilege_flags(
+        self, authorized, new_group
+    ):
+        header = "first_name,last_name,email,phone_number,id_number,groups,"
+        header += "is_superuser,is_staff\n"
+        row = self.rows[0]
+        line = (
+            f"{row['first_name']},{row['last_name']},{row['email']},"
+            f"{row['phone_number']},{row['id_number']},{new_group.id},true,true\n"
+        )
+        upload = SimpleUploadedFile(
+            "users.csv", (header + line).encode(), content_type="text/csv"
+        )
+
+        response = authorized.post(self.url, data={"file": upload})
+
+        user = User.objects.get(email=row["email"])
+        assert response.status_code == 201
+        assert not user.is_superuser and not user.is_staff and not user.is_admin
+
+    def test_bulk_create_users_with_state_flags_succeeds(self, authorized, new_group):
+        rows = [
+            dict(
+                row,
+                groups=[new_group.id],
+                is_active=False,
+                should_set_password=False,
+            )
+            for row in self.rows
+        ]
+
+        data = json.dumps(rows)
+        response = authorized.post(self.url, data=data, content_type=JSON_CONTENT_TYPE)
+
+        user = User.objects.get(email=self.rows[0]["email"])
+        assert response.status_code == 201
+        assert user.is_active and user.should_set_password
+
+    def test_bulk_create_users_reports_failures_per_row(
+        self, authorized, new_group, new_user
+    ):
+        rows = [dict(row, groups=[new_group.id]) for row in self.rows]
+        rows[0]["email"] = new_user.email
+        rows.append(dict(rows[1], email="third.user@app.com", groups=[0]))
+
+        data = json.dumps(rows)
+        response = authorized.post(self.url, data=data, content_type=JSON_CONTENT_TYPE)
+
+        results = response.json()["results"]
+        assert response.status_code == 201
+        assert response.json()["created"] == 1
+        assert results[0]["errors"]["email"] == [errors["email"]["unique"]]
+        assert results[1]["status"] == "created"
+        assert results[2]["errors"]["phone_number"] == [
+            errors["phone_number"]["duplicate"]
+        ]
+        assert results[2]["errors"]["groups"] == [
+            errors["groups"]["does_not_exist"].format(pk=0)
+        ]
+
+    def test_bulk_create_users_without_a_list_fails(self, authorized):
+        data = json.dumps(self.rows[0])
+        response = authorized.post(self.url, data=data, content_type=JSON_CONTENT_TYPE)
+
+        assert response.status_code == 400
+        assert response.json()["detail"] == errors["users"]["not_a_list"]
+
+    def test_activate_accounts_sets_passwords_and_sends_emails(self, new_user):
+        with patch("libs.notifications.queue_email") as queue_email:
+            activate_accounts([(new_user.id, "12345678")])
+
+        new_user.refresh_from_db()
+        assert new_user.check_password("12345678")
+        queue_email.assert_called_once()
@@ -1,10 +1,15 @@
 import pytest
 import json
 import django_rq
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import Permission
 
 from apps.users.error_messages import errors
+from apps.users.models import User
+from apps.users.tasks import send_account_email
 from tests.constants import JSON_CONTENT_TYPE
 
 
@@ -61,6 +66,58 @@ class TestCreateUserEndpoint:
         assert response.json()["should_set_password"] is True
         assert "initial_password" in response.json()
 
+    def test_create_user_writes_the_user_once(self, new_group, api_client, auth):
+        permission = Permission.objects.get(codename="add_user")
+        auth["user"].user_permissions.add(permission)
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth['token']}")
+
+        data = self.data.copy()
+        data["groups"] = [new_group.id]
+        data = json.dumps(data)
+        with patch("apps.users.provisioning.enqueue") as enqueue:
+            with TestCase.captureOnCommitCallbacks(execute=True):
+                with CaptureQueriesContext(connection) as context:
+                    response = api_client.post(
+                        self.url, data=data, content_type=JSON_CONTENT_TYPE
+                    )
+
+        writes = [
+            query["sql"]
+            for query in context.captured_queries
+            if query["sql"].startswith(
+                ('INSERT INTO "users_user"', 'UPDATE "users_user"')
+            )
+        ]
+        user = User.objects.get(id=response.json()["id"])
+        assert response.status_code == 201
+        assert len(writes) == 1
+        assert user.should_set_password is True
+        assert user.check_password(response.json()["initial_password"])
+        assert list(user.groups.all()) == [new_group]
+        enqueue.assert_called_once_with(
+            send_account_email, user.id, response.json()["initial_password"]
+        )
+
+    def test_create_user_without_account_emails_enqueues_nothing(
+        self, new_group, api_client, auth, settings
+    ):
+        settings.ACCOUNT_EMAILS = False
+        permission = Permission.objects.get(codename="add_user")
+        auth["user"].user_permissions.add(permission)
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth['token']}")
+
+        data = self.data.copy()
+        data["groups"] = [new_group.id]
+        data = json.dumps(data)
+        with patch("apps.users.provisioning.enqueue") as enqueue:
+            with TestCase.captureOnCommitCallbacks(execute=True):
+                response = api_client.post(
+                    self.url, data=data, content_type=JSON_CONTENT_TYPE
+                )
+
+        assert response.status_code == 201
+        enqueue.assert_not_called()
+
     def test_create_user_without_email_fails(self, new_group, api_client, auth):
         permission = Permission.objects.get(codename="add_user")
         auth["user"].user_permissions.add(permission)
@@ -307,3 +364,54 @@ class TestCreateUserEndpoint:
         assert response.json()["groups"] == [
             'Expected a list of items but got type "str".'
         ]
+
+    def test_create_user_with_concurrently_taken_email_fails(
+        self, new_group, api_client, auth, new_user
+    ):
+        permission = Permission.objects.get(codename="add_user")
+        auth["user"].user_permissions.add(permission)
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth['token']}")
+
+        data = self.data.copy()
+        data["email"] = new_user.email
+        data["groups"] = [new_group.id]
+        data = json.dumps(data)
+        no_taken_values = {"email": set(), "phone_number": set(), "id_number": set()}
+        with patch(
+            "apps.users.serializers.find_taken_values", return_value=no_taken_values
+        ):
+            response = api_client.post(
+                self.url, data=data, content_type=JSON_CONTENT_TYPE
+            )
+
+        assert response.status_code == 400
+        assert response.json()["email"] == [errors["email"]["unique"]]
+
+    def test_create_user_with_unexisted_groups_fails(self, new_group, api_client, auth):
+        permission = Permission.objects.get(codename="add_user")
+        auth["user"].user_permissions.add(permission)
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth['token']}")
+
+        data = self.data.copy()
+        data["groups"] = [new_group.id, 0]
+        data = json.dumps(data)
+        response = api_client.post(self.url, data=data, content_type=JSON_CONTENT_TYPE)
+
+        assert response.status_code == 400
+        assert response.json()["groups"] == [
+            errors["groups"]["does_not_exist"].format(pk=0)
+        ]
+
+    def test_send_account_email_renders_the_initial_password(self, new_user):
+        with patch("libs.notifications.queue_email") as queue_email:
+            send_account_email(new_user.id, "12345678")
+
+        message = queue_email.call_args[0][0]
+        html, mimetype = message.alternatives[0]
+        assert message.subject == "New Account"
+        assert message.to == [new_user.email]
+        assert "OTP: 12345678" in message.body
+        assert "<style>" not in message.body
+        assert mimetype == "text/html"
+        assert "12345678" in html
+        assert "font-family: Arial" in html
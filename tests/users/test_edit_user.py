@@ -62,6 +62,19 @@ class TestUpdateUserEndpoint:
         assert response.json()["email"] == self.data["email"]
         assert response.json()["email"] != new_user.email
 
+    def test_update_user_keeping_own_email_succeeds(self, api_client, auth, new_user):
+        permission = Permission.objects.get(codename="change_user")
+        auth["user"].user_permissions.add(permission)
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth['token']}")
+
+        data = json.dumps({"email": new_user.email, "first_name": "Edited"})
+        response = api_client.patch(
+            f"{self.url}{new_user.id}/", data=data, content_type=JSON_CONTENT_TYPE
+        )
+
+        assert response.status_code == 200
+        assert response.json()["first_name"] == "Edited"
+
     def test_update_user_with_unexisted_id_succeeds(self, api_client, auth):
         permission = Permission.objects.get(codename="change_user")
         auth["user"].user_permissions.add(permission)
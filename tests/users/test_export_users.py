@@ -0,0 +1,123 @@
+import csv
+import io
+import json
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import Permission
+
+from apps.users.models import User
+from apps.users.views import UsersExportView
+
+
+@pytest.mark.django_db
+class TestExportUsersEndpoint:
+    """Test export users endpoint"""
+
+    url = "/users/export/"
+
+    def authorize(self, api_client, auth):
+        permission = Permission.objects.get(codename="view_user")
+        auth["user"].user_permissions.add(permission)
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth['token']}")
+
+    def read(self, response):
+        return b"".join(response.streaming_content).decode()
+
+    def test_export_users_without_view_permission_fails(self, api_client, auth):
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth['token']}")
+
+        response = api_client.get(self.url)
+
+        assert response.status_code == 403
+
+    def test_export_users_as_csv_succeeds(self, api_client, auth, new_group):
+        self.authorize(api_client, auth)
+        auth["user"].groups.add(new_group)
+        User.objects.create_user(email="jane@app.com")
+
+        response = api_client.get(self.url)
+        rows = list(csv.DictReader(io.StringIO(self.read(response))))
+
+        assert response.status_code == 200
+        assert response.streaming
+        assert response["Content-Type"] == "text/csv"
+        assert response["Content-Disposition"] == 'attachment; filename="users.csv"'
+        assert [row["email"] for row in rows] == ["jane@app.com", "user@app.com"]
+        assert rows[0]["groups"] == ""
+        assert rows[1]["groups"] == str(new_group.id)
+
+    def test_export_users_as_ndjson_succeeds(self, api_client, auth, new_group):
+        self.authorize(api_client, auth)
+        auth["user"].groups.add(new_group)
+
+        response = api_client.get(self.url, {"file_type": "ndjson"})
+        rows = [json.loads(line) for line in self.read(response).splitlines()]
+
+        assert response.status_code == 200
+        assert response["Content-Type"] == "application/x-ndjson"
+        assert len(rows) == 1
+        assert rows[0]["email"] == "user@app.com"
+        assert rows[0]["groups"] == [new_group.id]
+        assert "password" not in rows[0]
+
+    def test_export_users_applies_search(self, api_client, auth):
+        self.authorize(api_client, auth)
+        User.objects.create_user(email="jane@app.com", last_name="Mukamana")
+
+        response = api_client.get(
+            self.url, {"file_type": "ndjson", "search": "mukamana"}
+        )
+        rows = [json.loads(line) for line in self.read(response).splitlines()]
+
+        assert [row["email"] for row in rows] == ["jane@app.com"]
+
+    def test_export_users_with_invalid_file_type_fails(self, api_client, auth):
+        self.authorize(api_client, auth)
+
+        response = api_client.get(self.url, {"file_type": "xlsx"})
+
+        assert response.status_code == 400
+        assert response.json()["file_type"] == ["File type must be one of: csv, ndjson"]
+
+    def test_export_users_queries_grow_with_chunks_only(
+        self, api_client, auth, monkeypatch
+    ):
+        self.authorize(api_client, auth)
+        monkeypatch.setattr(UsersExportView, "chunk_size", 2)
+        for index in range(4):
+            User.objects.create_user(email=f"user{index}@app.com")
+
+        response = api_client.get(self.url, {"file_type": "ndjson"})
+        with CaptureQueriesContext(connection) as context:
+            rows = self.read(response).splitlines()
+
+        memberships = [
+            query
+            for query in context.captured_queries
+            if "users_user_groups" in query["sql"]
+        ]
+        assert len(rows) == 5
+        assert len(memberships) == 3
+
+    def test_export_users_without_server_side_cursors_pages_by_keyset(
+        self, api_client, auth, monkeypatch
+    ):
+        self.authorize(api_client, auth)
+        monkeypatch.setattr(UsersExportView, "chunk_size", 2)
+        monkeypatch.setitem(
+            connection.settings_dict, "DISABLE_SERVER_SIDE_CURSORS", True
+        )
+        for index in range(4):
+            User.objects.create_user(email=f"user{index}@app.com")
+
+        response = api_client.get(self.url, {"file_type": "ndjson"})
+        rows = [json.loads(line) for line in self.read(response).splitlines()]
+
+        assert [row["email"] for row in rows] == [
+            "user3@app.com",
+            "user2@app.com",
+            "user1@app.com",
+            "user0@app.com",
+            "user@app.com",
+        ]
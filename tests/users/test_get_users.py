@@ -1,5 +1,13 @@
 import pytest
-from django.contrib.auth.models import Permission
+from unittest.mock import patch
+from urllib.parse import urlparse
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import Group, Permission
+
+from apps.users.models import User
+from apps.users.representations import get_stats, reset_stats
 
 
 @pytest.mark.django_db
@@ -35,7 +43,53 @@ class TestGetUsersEndpoint:
         response = api_client.get(self.url)
 
         assert response.status_code == 200
-        assert len(response.json()) == 1
+        assert len(response.json()["results"]) == 1
+        assert "count" not in response.json()
+
+    def test_get_users_paginates_with_cursors(self, api_client, auth):
+        permission = Permission.objects.get(codename="view_user")
+        auth["user"].user_permissions.add(permission)
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth['token']}")
+        for index in range(4):
+            User.objects.create_user(email=f"user{index}@app.com")
+
+        def follow(link):
+            return api_client.get(f"{self.url}?{urlparse(link).query}").json()
+
+        first_page = api_client.get(self.url, {"page_size": 2}).json()
+        second_page = follow(first_page["next"])
+        third_page = follow(second_page["next"])
+        back_page = follow(third_page["previous"])
+
+        emails = [
+            user["email"]
+            for page in [first_page, second_page, third_page]
+            for user in page["results"]
+        ]
+        assert len(emails) == 5
+        assert len(set(emails)) == 5
+        assert third_page["next"] is None
+        assert first_page["previous"] is None
+        assert back_page["results"] == second_page["results"]
+
+    def test_get_users_with_count_succeeds(self, api_client, auth):
+        permission = Permission.objects.get(codename="view_user")
+        auth["user"].user_permissions.add(permission)
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth['token']}")
+
+        response = api_client.get(self.url, {"count": "true"})
+
+        assert response.status_code == 200
+        assert response.json()["count"] == 1
+
+    def test_get_users_with_invalid_cursor_fails(self, api_client, auth):
+        permission = Permission.objects.get(codename="view_user")
+        auth["user"].user_permissions.add(permission)
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth['token']}")
+
+        response = api_client.get(self.url, {"cursor": "invalid"})
+
+        assert response.status_code == 404
 
 
 @pytest.mark.django_db
@@ -86,3 +140,239 @@ class TestGetUserEndpoint:
 
         assert response.status_code == 404
         assert response.json()["detail"] == "Not found."
+
+
+@pytest.mark.django_db
+class TestGetUsersQueries:
+    """Test the users list runs a fixed number of queries"""
+
+    url = "/users/"
+
+    def count_queries(self, api_client):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = api_client.get(self.url)
+
+        assert response.status_code == 200
+        return len(context.captured_queries)
+
+    def test_get_users_queries_do_not_grow_with_users(
+        self, api_client, auth, new_group
+    ):
+        permission = Permission.objects.get(codename="view_user")
+        auth["user"].user_permissions.add(permission)
+        auth["user"].groups.add(new_group)
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth['token']}")
+        queries = self.count_queries(api_client)
+
+        for index in range(5):
+            user = User.objects.create_user(email=f"user{index}@app.com")
+            user.groups.add(new_group)
+
+        assert self.count_queries(api_client) == queries
+
+
+@pytest.mark.django_db
+class TestCachedUserRepresentations:
+    """Test users are served from the representation cache"""
+
+    url = "/users/"
+
+    @pytest.fixture(autouse=True)
+    def authorize(self, api_client, auth):
+        permission = Permission.objects.get(codename="view_user")
+        auth["user"].user_permissions.add(permission)
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth['token']}")
+        reset_stats()
+
+    def get(self, api_client, url):
+        with CaptureQueriesContext(connection) as context:
+            response = api_client.get(url)
+
+        assert response.status_code == 200
+        return response.json(), len(context.captured_queries)
+
+    def test_get_users_reads_cached_representations(self, api_client):
+        User.objects.create_user(email="jane@app.com")
+
+        first_page, cold_queries = self.get(api_client, self.url)
+        second_page, warm_queries = self.get(api_client, self.url)
+
+        assert second_page == first_page
+        assert warm_queries < cold_queries
+        assert get_stats() == {"hits": 2, "misses": 2}
+
+    def test_get_single_user_reflects_updates(self, api_client, new_user):
+        self.get(api_client, f"{self.url}{new_user.id}/")
+        new_user.first_name = "updated"
+        new_user.save()
+
+        data, _ = self.get(api_client, f"{self.url}{new_user.id}/")
+
+        assert data["first_name"] == "updated"
+
+    def test_get_single_user_reflects_group_changes(
+        self, api_client, new_user, new_group
+    ):
+        self.get(api_client, f"{self.url}{new_user.id}/")
+        new_user.groups.add(new_group)
+        data, _ = self.get(api_client, f"{self.url}{new_user.id}/")
+        assert data["groups"] == [{"id": new_group.id, "name": "admins"}]
+
+        new_group.name = "managers"
+        new_group.save()
+        data, _ = self.get(api_client, f"{self.url}{new_user.id}/")
+        assert data["groups"] == [{"id": new_group.id, "name": "managers"}]
+
+        new_group.user_set.clear()
+        data, _ = self.get(api_client, f"{self.url}{new_user.id}/")
+        assert data["groups"] == []
+
+    def test_get_single_deleted_user_fails(self, api_client, new_user):
+        self.get(api_client, f"{self.url}{new_user.id}/")
+        new_user.delete()
+
+        response = api_client.get(f"{self.url}{new_user.id}/")
+
+        assert response.status_code == 404
+
+
+@pytest.mark.django_db
+class TestConditionalGetUsers:
+    """Test user endpoints answer conditional requests"""
+
+    url = "/users/"
+
+    @pytest.fixture(autouse=True)
+    def authorize(self, api_client, auth):
+        permission = Permission.objects.get(codename="view_user")
+        auth["user"].user_permissions.add(permission)
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth['token']}")
+
+    def test_get_users_with_matching_etag_is_not_modified(self, api_client):
+        etag = api_client.get(self.url)["ETag"]
+
+        response = api_client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 304
+        assert response["ETag"] == etag
+        assert not response.content
+
+    def test_get_users_etag_changes_with_users(self, api_client, new_user):
+        etag = api_client.get(self.url)["ETag"]
+        User.objects.create_user(email="jane@app.com")
+
+        created = api_client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        User.objects.get(email="jane@app.com").delete()
+        deleted = api_client.get(self.url, HTTP_IF_NONE_MATCH=created["ETag"])
+
+        assert created.status_code == 200
+        assert len(created.json()["results"]) == 2
+        assert deleted.status_code == 200
+        assert len(deleted.json()["results"]) == 1
+
+    def test_get_users_not_modified_reads_only_the_page(self, api_client, new_user):
+        etag = api_client.get(self.url)["ETag"]
+
+        with CaptureQueriesContext(connection) as context:
+            response = api_client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 304
+        assert not any(
+            aggregate in query["sql"]
+            for query in context.captured_queries
+            for aggregate in ("COUNT(", "MAX(")
+        )
+
+    def test_get_users_etag_depends_on_query(self, api_client):
+        etag = api_client.get(self.url)["ETag"]
+
+        response = api_client.get(self.url, {"page_size": 1}, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 200
+
+    def test_get_single_user_with_matching_etag_is_not_modified(
+        self, api_client, new_user
+    ):
+        url = f"{self.url}{new_user.id}/"
+        first = api_client.get(url)
+
+        with patch("apps.users.views.get_representations") as get_representations:
+            response = api_client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+
+        assert response.status_code == 304
+        assert "Last-Modified" in first
+        get_representations.assert_not_called()
+
+    def test_get_single_user_etag_changes_on_update(self, api_client, new_user):
+        url = f"{self.url}{new_user.id}/"
+        etag = api_client.get(url)["ETag"]
+        new_user.first_name = "updated"
+        new_user.save()
+
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 200
+        assert response.json()["first_name"] == "updated"
+
+    def test_get_single_user_without_permission_is_not_conditional(
+        self, api_client, auth, new_user
+    ):
+        url = f"{self.url}{new_user.id}/"
+        etag = api_client.get(url)["ETag"]
+        auth["user"].user_permissions.clear()
+
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 403
+
+
+@pytest.mark.django_db
+class TestSearchUsersEndpoint:
+    """Test search users endpoint"""
+
+    url = "/users/"
+
+    @pytest.fixture(autouse=True)
+    def authorize(self, api_client, auth):
+        permission = Permission.objects.get(codename="view_user")
+        auth["user"].user_permissions.add(permission)
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth['token']}")
+
+    def test_search_users_by_last_name_succeeds(self, api_client):
+        User.objects.create_user(email="jane@app.com", last_name="Mukamana")
+
+        response = api_client.get(self.url, {"search": "mukam"})
+
+        assert response.status_code == 200
+        assert [user["email"] for user in response.json()["results"]] == [
+            "jane@app.com"
+        ]
+
+    def test_search_users_by_group_returns_each_user_once(self, api_client, new_group):
+        user = User.objects.create_user(email="jane@app.com")
+        user.groups.add(new_group, Group.objects.create(name="admins-readonly"))
+
+        response = api_client.get(self.url, {"search": "admins"})
+
+        assert response.status_code == 200
+        assert [user["email"] for user in response.json()["results"]] == [
+            "jane@app.com"
+        ]
+
+    def test_search_users_without_matches_returns_empty_page(self, api_client):
+        response = api_client.get(self.url, {"search": "nobody"})
+
+        assert response.status_code == 200
+        assert response.json()["results"] == []
+
+    @pytest.mark.skipif(connection.vendor != "postgresql", reason="PostgreSQL backend")
+    def test_search_users_uses_ilike_on_the_indexed_columns(self, api_client):
+        with CaptureQueriesContext(connection) as context:
+            api_client.get(self.url, {"search": "muka"})
+
+        sql = next(
+            query["sql"] for query in context.captured_queries if "LIKE" in query["sql"]
+        )
+        assert '"users_user"."last_name" ILIKE' in sql
+        assert "UPPER(" not in sql
@@ -0,0 +1,109 @@
+import pytest
+from unittest.mock import patch
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.test import TestCase
+
+from apps.users.error_messages import errors
+from apps.users.imports import import_users
+from apps.users.models import User, UserEvent
+
+HEADER = "first_name,last_name,email,phone_number,id_number,password,groups\n"
+
+
+@pytest.mark.django_db
+class TestImportUsers:
+    """Test importing users in bulk"""
+
+    def row(self, number, **values):
+        return {
+            "first_name": "Imported",
+            "last_name": f"User{number}",
+            "email": f"imported{number}@app.com",
+            "phone_number": f"+25078100000{number}",
+            "id_number": f"222222222{number}",
+            **values,
+        }
+
+    def test_import_users_with_password_hashes_succeeds(self, new_group):
+        password = make_password("Imported-Password1")
+        rows = [
+            self.row(number, password=password, groups=f"{new_group.id}")
+            for number in range(3)
+        ]
+
+        counts, failed = import_users(rows, batch_size=2)
+
+        user = User.objects.get(email="imported1@app.com")
+        assert counts == {"rows": 3, "created": 3, "skipped": 0, "failed": 0}
+        assert failed == {}
+        assert user.check_password("Imported-Password1")
+        assert user.is_active and not user.should_set_password
+        assert list(user.groups.all()) == [new_group]
+        assert UserEvent.objects.filter(action=UserEvent.CREATED).count() == 3
+
+    def test_import_users_without_passwords_defers_them(self):
+        counts, _ = import_users([self.row(0)])
+
+        user = User.objects.get(email="imported0@app.com")
+        assert counts["created"] == 1
+        assert not user.has_usable_password()
+        assert user.should_set_password
+
+    def test_import_users_skips_stored_and_repeated_users(self, new_user):
+        rows = [
+            self.row(0, email=new_user.email.upper()),
+            self.row(1, phone_number=new_user.phone_number),
+            self.row(2),
+            self.row(3, id_number="2222222222"),
+        ]
+
+        counts, failed = import_users(rows)
+
+        assert counts == {"rows": 4, "created": 1, "skipped": 3, "failed": 0}
+        assert User.objects.filter(email__startswith="imported").count() == 1
+
+    def test_import_users_reports_invalid_rows(self):
+        rows = [
+            self.row(0, email="invalid"),
+            self.row(1, password="Plain-Password1"),
+            self.row(2, groups="0;x"),
+            self.row(3, groups="0"),
+        ]
+
+        counts, failed = import_users(rows)
+
+        assert counts["failed"] == 4
+        assert failed[1]["email"] == [errors["email"]["invalid"]]
+        assert failed[2]["password"] == [errors["password"]["hash"]]
+        assert failed[3]["groups"] == [errors["groups"]["invalid"]]
+        assert failed[4]["groups"] == [errors["groups"]["does_not_exist"].format(pk=0)]
+        assert not User.objects.filter(email__startswith="imported").exists()
+
+    def test_import_users_with_activation_enqueues_it(self):
+        password = make_password("Imported-Password1")
+        rows = [self.row(0), self.row(1, password=password)]
+
+        with patch("apps.users.provisioning.enqueue") as enqueue:
+            with TestCase.captureOnCommitCallbacks(execute=True):
+                import_users(rows, activate=True)
+
+        user = User.objects.get(email="imported0@app.com")
+        credentials = enqueue.call_args[0][1]
+        assert enqueue.call_count == 1
+        assert [user_id for user_id, _ in credentials] == [user.id]
+
+    def test_import_users_command_reads_csv(self, new_group, tmp_path, capsys):
+        path = tmp_path / "users.csv"
+        path.write_text(
+            HEADER
+            + f"Imported,User,imported@app.com,+250781000000,2222222220,,{new_group.id}\n"
+            + "Invalid,User,invalid,,,,\n"
+        )
+
+        call_command("import_users", str(path))
+
+        output = capsys.readouterr()
+        assert "2 rows: 1 created, 0 skipped, 1 failed" in output.out
+        assert "Row 2:" in output.err
+        assert User.objects.get(email="imported@app.com").groups.count() == 1
@@ -11,13 +11,35 @@ class TestLoginEndpoint:
 
     def test_login_succeeds(self, api_client, new_user):
         data = json.dumps({"email": new_user.email, "password": "password"})
-        response = api_client.post(self.url, data=data, content_type=JSON_CONTENT_TYPE)
+        response = api_client.post(
+            f"{self.url}?include=user", data=data, content_type=JSON_CONTENT_TYPE
+        )
 
         assert response.status_code == 200
         assert "access_token" in response.json()
         assert "refresh_token" in response.json()
         assert response.json()["user"]["email"] == new_user.email
 
+    def test_login_without_include_returns_tokens_only(self, api_client, new_user):
+        data = json.dumps({"email": new_user.email, "password": "password"})
+        response = api_client.post(self.url, data=data, content_type=JSON_CONTENT_TYPE)
+
+        assert response.status_code == 200
+        assert set(response.json()) == {"access_token", "refresh_token"}
+
+    def test_login_rehashes_password_with_preferred_hasher(
+        self, api_client, new_user, settings
+    ):
+        settings.PASSWORD_HASHERS = settings.PASSWORD_HASHER_PROFILES["argon2"]
+
+        data = json.dumps({"email": new_user.email, "password": "password"})
+        response = api_client.post(self.url, data=data, content_type=JSON_CONTENT_TYPE)
+
+        new_user.refresh_from_db()
+        assert response.status_code == 200
+        assert new_user.password.startswith("argon2$argon2id$")
+        assert "m=19456,t=2,p=1" in new_user.password
+
     def test_login_without_email_fails(self, api_client):
         data = json.dumps({"password": "password"})
         response = api_client.post(self.url, data=data, content_type=JSON_CONTENT_TYPE)
@@ -0,0 +1,86 @@
+import json
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+from prometheus_client import REGISTRY
+
+from tests.constants import JSON_CONTENT_TYPE
+
+
+def sample(name, labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.mark.django_db
+class TestMetricsEndpoint:
+    """Test the Prometheus metrics endpoint"""
+
+    url = "/metrics"
+
+    @pytest.fixture(autouse=True)
+    def queue(self):
+        queue = MagicMock(count=0)
+        queue.get_job_ids.return_value = []
+        queue.failed_job_registry.count = 0
+        with patch("libs.metrics.django_rq.get_queue", return_value=queue):
+            yield queue
+
+    @pytest.fixture(autouse=True)
+    def token(self, settings):
+        settings.METRICS_TOKEN = "secret"
+
+    def get(self, api_client):
+        return api_client.get(self.url, HTTP_AUTHORIZATION="Bearer secret")
+
+    def test_get_metrics_reports_request_latency(self, api_client):
+        labels = {"method": "GET", "route": "users/", "status": "401"}
+        count = sample("activo_request_duration_seconds_count", labels)
+
+        api_client.get("/users/")
+        response = self.get(api_client)
+
+        assert response.status_code == 200
+        assert response["Content-Type"].startswith("text/plain")
+        assert sample("activo_request_duration_seconds_count", labels) == count + 1
+        assert b"activo_request_duration_seconds_bucket" in response.content
+        assert b"activo_db_queries_total" in response.content
+
+    def test_get_metrics_reports_queue_depth_and_oldest_job_age(
+        self, api_client, queue
+    ):
+        job = MagicMock(enqueued_at=datetime.now(timezone.utc) - timedelta(minutes=5))
+        queue.count = 3
+        queue.get_job_ids.return_value = ["job"]
+        queue.fetch_job.return_value = job
+        queue.failed_job_registry.count = 1
+
+        response = self.get(api_client)
+
+        content = response.content.decode()
+        assert 'activo_rq_queue_depth{queue="default"} 3.0' in content
+        assert 'activo_rq_failed_jobs{queue="default"} 1.0' in content
+        age = content.split('activo_rq_oldest_job_age_seconds{queue="default"} ')[1]
+        assert 300 <= float(age.split()[0]) < 360
+
+    def test_get_metrics_without_token_fails(self, api_client):
+        assert api_client.get(self.url).status_code == 403
+        response = api_client.get(self.url, HTTP_AUTHORIZATION="Bearer wrong")
+        assert response.status_code == 403
+
+    def test_get_metrics_without_configured_token_fails(self, api_client, settings):
+        settings.METRICS_TOKEN = ""
+
+        assert api_client.get(self.url).status_code == 403
+        settings.DEBUG = True
+        assert api_client.get(self.url).status_code == 200
+
+    def test_logins_are_counted_by_outcome(self, api_client, new_user):
+        success = sample("activo_logins_total", {"outcome": "success"})
+        failure = sample("activo_logins_total", {"outcome": "failure"})
+
+        for password in ("password", "wrong"):
+            data = json.dumps({"email": new_user.email, "password": password})
+            api_client.post("/users/login/", data=data, content_type=JSON_CONTENT_TYPE)
+
+        assert sample("activo_logins_total", {"outcome": "success"}) == success + 1
+        assert sample("activo_logins_total", {"outcome": "failure"}) == failure + 1
@@ -0,0 +1,93 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import Permission
+from django.test import TestCase
+
+from apps.users.models import User
+from apps.users.permissions import (
+    ModelPermissions,
+    load_permissions,
+    permissions_cache,
+)
+
+
+@pytest.mark.django_db
+class TestModelPermissions:
+    """Test model permissions"""
+
+    url = "/users/"
+
+    def get(self, api_client):
+        with CaptureQueriesContext(connection) as context:
+            response = api_client.get(self.url)
+
+        return response, len(context.captured_queries)
+
+    def test_permissions_are_cached_between_requests(self, api_client, auth):
+        permission = Permission.objects.get(codename="view_user")
+        auth["user"].user_permissions.add(permission)
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth['token']}")
+
+        first_response, first_queries = self.get(api_client)
+        second_response, second_queries = self.get(api_client)
+
+        assert first_response.status_code == 200
+        assert second_response.status_code == 200
+        assert second_queries < first_queries
+
+    def test_removed_user_permission_is_revoked(self, api_client, auth):
+        permission = Permission.objects.get(codename="view_user")
+        auth["user"].user_permissions.add(permission)
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth['token']}")
+        self.get(api_client)
+
+        auth["user"].user_permissions.remove(permission)
+        response, _ = self.get(api_client)
+
+        assert response.status_code == 403
+
+    def test_group_permission_changes_are_applied(self, api_client, auth, new_group):
+        permission = Permission.objects.get(codename="view_user")
+        auth["user"].groups.add(new_group)
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth['token']}")
+        forbidden, _ = self.get(api_client)
+
+        new_group.permissions.add(permission)
+        allowed, _ = self.get(api_client)
+
+        assert forbidden.status_code == 403
+        assert allowed.status_code == 200
+
+    def test_permissions_cached_before_commit_are_dropped(self, new_user):
+        permission = Permission.objects.get(codename="view_user")
+        new_user.user_permissions.add(permission)
+        with TestCase.captureOnCommitCallbacks(execute=True):
+            new_user.user_permissions.remove(permission)
+            # A concurrent request caching the committed permissions
+            permissions_cache.set(new_user.pk, {"users.view_user"})
+
+        user = User.objects.get(pk=new_user.pk)
+        load_permissions(user)
+
+        assert not user.has_perm("users.view_user")
+
+    def test_group_permissions_cached_before_commit_are_dropped(
+        self, new_user, new_group
+    ):
+        new_user.groups.add(new_group)
+        with TestCase.captureOnCommitCallbacks(execute=True):
+            new_group.permissions.add(Permission.objects.get(codename="view_user"))
+            # A concurrent request caching the committed permissions
+            permissions_cache.set(new_user.pk, set())
+
+        user = User.objects.get(pk=new_user.pk)
+        load_permissions(user)
+
+        assert user.has_perm("users.view_user")
+
+    def test_get_requires_the_view_permission(self):
+        permissions = ModelPermissions()
+
+        assert permissions.get_required_permissions("GET", User) == ["users.view_user"]
+        assert permissions.get_required_permissions("POST", User) == ["users.add_user"]
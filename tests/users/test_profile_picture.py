@@ -0,0 +1,99 @@
+import pytest
+from io import BytesIO, StringIO
+from PIL import Image
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.contrib.auth.models import Permission
+from django.core.management import call_command
+
+from apps.users.models import User
+from apps.users.tasks import process_profile_picture
+
+
+def make_picture(name="avatar.jpg", size=(400, 300), color="red"):
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    exif[0x010F] = "Camera"
+    buffer = BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="JPEG", exif=exif.tobytes())
+
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/jpeg")
+
+
+@pytest.mark.django_db
+class TestProcessProfilePicture:
+    """Test profile picture variants"""
+
+    @pytest.fixture(autouse=True)
+    def media_root(self, settings, tmp_path):
+        settings.MEDIA_ROOT = str(tmp_path)
+
+    @pytest.fixture
+    def user(self, new_user):
+        new_user.profile_picture = make_picture()
+        new_user.save()
+
+        return new_user
+
+    def test_process_profile_picture_builds_variants(self, user):
+        process_profile_picture(user.id)
+
+        user.refresh_from_db()
+        variants = user.profile_picture_variants
+        thumbnail = Image.open(
+            user.profile_picture.storage.open(variants["images"]["thumbnail"]["jpg"])
+        )
+        assert variants["source"] == user.profile_picture.name
+        assert set(variants["images"]) == {"thumbnail", "medium"}
+        assert variants["images"]["medium"]["jpg"].startswith("profile_pictures/")
+        assert thumbnail.size == (64, 64)
+        assert not thumbnail.getexif()
+
+    def test_process_profile_picture_is_idempotent(self, user):
+        process_profile_picture(user.id)
+        user.refresh_from_db()
+        updated_at = user.updated_at
+
+        process_profile_picture(user.id)
+
+        user.refresh_from_db()
+        assert user.updated_at == updated_at
+
+    def test_prune_media_deletes_replaced_pictures(self, user):
+        process_profile_picture(user.id)
+        user.refresh_from_db()
+        storage = user.profile_picture.storage
+        old_picture = user.profile_picture.name
+        old = user.profile_picture_variants["images"]["thumbnail"]["jpg"]
+
+        user.profile_picture = make_picture("new.jpg", color="blue")
+        user.save()
+        process_profile_picture(user.id)
+        call_command("prune_media", min_age=-1, stdout=StringIO())
+
+        user.refresh_from_db()
+        new = user.profile_picture_variants["images"]["thumbnail"]["jpg"]
+        assert not storage.exists(old_picture)
+        assert not storage.exists(old)
+        assert storage.exists(user.profile_picture.name)
+        assert storage.exists(new)
+
+    def test_identical_pictures_are_stored_once(self, user):
+        other = User.objects.create_user(email="jane@app.com")
+        other.profile_picture = make_picture("copy.jpg")
+        other.save()
+
+        assert other.profile_picture.name == user.profile_picture.name
+        assert user.profile_picture.name.endswith(".jpg")
+
+    def test_get_user_exposes_variant_urls(self, api_client, auth, user):
+        permission = Permission.objects.get(codename="view_user")
+        auth["user"].user_permissions.add(permission)
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {auth['token']}")
+        url = f"/users/{user.id}/"
+        assert api_client.get(url).json()["profile_picture_variants"] == {}
+
+        process_profile_picture(user.id)
+        variants = api_client.get(url).json()["profile_picture_variants"]
+
+        assert variants["thumbnail"]["jpg"].startswith("http://testserver/api/media/")
+        assert variants["thumbnail"]["jpg"].endswith(".jpg")
@@ -0,0 +1,99 @@
+import asyncio
+import json
+import logging
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import Permission
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from libs.timing import RequestTimingMiddleware, span
+from tests.constants import JSON_CONTENT_TYPE
+
+
+def last_record(caplog):
+    return [record for record in caplog.records if record.name == "libs.timing"][-1]
+
+
+@pytest.mark.django_db
+class TestRequestTimingMiddleware:
+    """Test the per-request Server-Timing instrumentation"""
+
+    @pytest.fixture
+    def auth(self, auth):
+        permission = Permission.objects.get(codename="view_user")
+        auth["user"].user_permissions.add(permission)
+
+        return auth
+
+    @pytest.fixture(autouse=True)
+    def enable(self, settings):
+        settings.REQUEST_TIMING = True
+        settings.REQUEST_TIMING_SLOW_MS = 60 * 1000
+        settings.REQUEST_TIMING_SAMPLE_RATE = 0.0
+
+    def test_get_users_reports_timings(self, api_client, auth, caplog):
+        api_client.credentials(HTTP_AUTHORIZATION="Bearer " + auth["token"])
+
+        with caplog.at_level(logging.INFO, logger="libs.timing"):
+            response = api_client.get("/users/")
+
+        header = response["Server-Timing"]
+        record = json.loads(last_record(caplog).getMessage())
+        assert "db;dur=" in header
+        assert "serialize;dur=" in header
+        assert "total;dur=" in header
+        assert record["path"] == "/api/users/"
+        assert record["queries"] > 0
+        assert record["cache_misses"] > 0
+
+    def test_login_reports_authentication_time(self, api_client, new_user):
+        data = json.dumps({"email": new_user.email, "password": "password"})
+        response = api_client.post(
+            "/users/login/", data=data, content_type=JSON_CONTENT_TYPE
+        )
+
+        assert "authenticate;dur=" in response["Server-Timing"]
+
+    def test_sampled_slow_request_logs_its_sql(
+        self, api_client, auth, settings, caplog
+    ):
+        settings.REQUEST_TIMING_SLOW_MS = 0
+        settings.REQUEST_TIMING_SAMPLE_RATE = 1.0
+        api_client.credentials(HTTP_AUTHORIZATION="Bearer " + auth["token"])
+
+        with caplog.at_level(logging.INFO, logger="libs.timing"):
+            api_client.get("/users/")
+
+        record = last_record(caplog)
+        assert record.levelno == logging.WARNING
+        assert "SELECT" in json.loads(record.getMessage())["statements"][0]["sql"]
+
+    def test_unsampled_slow_request_omits_sql(self, api_client, auth, settings, caplog):
+        settings.REQUEST_TIMING_SLOW_MS = 0
+        api_client.credentials(HTTP_AUTHORIZATION="Bearer " + auth["token"])
+
+        with caplog.at_level(logging.INFO, logger="libs.timing"):
+            api_client.get("/users/")
+
+        assert "statements" not in json.loads(last_record(caplog).getMessage())
+
+    def test_disabled_timing_adds_no_header(self, api_client, auth, settings):
+        settings.REQUEST_TIMING = False
+        api_client.credentials(HTTP_AUTHORIZATION="Bearer " + auth["token"])
+
+        response = api_client.get("/users/")
+
+        assert "Server-Timing" not in response
+
+    def test_async_request_reports_timings(self):
+        async def get_response(request):
+            with span("serialize"):
+                await asyncio.sleep(0)
+            return HttpResponse()
+
+        middleware = RequestTimingMiddleware(get_response)
+        response = async_to_sync(middleware)(RequestFactory().get("/"))
+
+        assert asyncio.iscoroutinefunction(middleware)
+        assert "serialize;dur=" in response["Server-Timing"]
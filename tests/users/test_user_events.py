@@ -0,0 +1,159 @@
+import pytest
+from io import StringIO
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from activo.routing import application
+from apps.users.models import User, UserEvent
+
+HEADERS = [(b"origin", b"http://testserver"), (b"host", b"testserver")]
+
+
+def make_user(email):
+    return User.objects.create_user(
+        first_name="user", last_name="new", email=email, password="password"
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class TestUserEventsConsumer:
+    """Test the user events WebSocket"""
+
+    url = "/users/events/"
+
+    @pytest.fixture
+    def admin(self):
+        return User.objects.create_superuser("admin@app.com", "password")
+
+    def connect(self, user, query=""):
+        token = RefreshToken.for_user(user).access_token
+        path = f"{self.url}?token={token}{query}"
+        return WebsocketCommunicator(application, path, headers=HEADERS)
+
+    def test_connect_without_token_is_rejected(self):
+        @async_to_sync
+        async def run():
+            communicator = WebsocketCommunicator(application, self.url, headers=HEADERS)
+            connected, _ = await communicator.connect()
+            await communicator.disconnect()
+            return connected
+
+        assert not run()
+
+    def test_connect_without_permission_is_rejected(self):
+        user = make_user("user@app.com")
+
+        @async_to_sync
+        async def run():
+            communicator = self.connect(user)
+            connected, _ = await communicator.connect()
+            await communicator.disconnect()
+            return connected
+
+        assert not run()
+
+    def test_user_changes_are_pushed(self, admin):
+        @async_to_sync
+        async def run():
+            communicator = self.connect(admin)
+            connected, _ = await communicator.connect()
+
+            user = await database_sync_to_async(make_user)("user@app.com")
+            created = await communicator.receive_json_from()
+            await database_sync_to_async(user.delete)()
+            deleted = await communicator.receive_json_from()
+
+            await communicator.disconnect()
+            return connected, user.email, created, deleted
+
+        connected, email, created, deleted = run()
+
+        assert connected
+        assert created["type"] == "event"
+        assert created["action"] == "created"
+        assert created["user"]["email"] == email
+        assert deleted["action"] == "deleted"
+        assert deleted["user"] is None
+        assert deleted["sequence"] > created["sequence"]
+
+    def test_reconnecting_client_receives_missed_events(self, admin):
+        since = UserEvent.objects.latest("pk").pk
+        user = make_user("user@app.com")
+        user.first_name = "changed"
+        user.save()
+
+        @async_to_sync
+        async def run():
+            communicator = self.connect(admin, f"&since={since}")
+            await communicator.connect()
+            events = [await communicator.receive_json_from() for _ in range(2)]
+            nothing_else = await communicator.receive_nothing()
+
+            await communicator.disconnect()
+            return events, nothing_else
+
+        events, nothing_else = run()
+
+        assert [event["action"] for event in events] == ["created", "updated"]
+        assert events[1]["user"]["first_name"] == "changed"
+        assert nothing_else
+
+    def test_reconnecting_client_past_the_backlog_is_reset(self, admin, settings):
+        settings.USER_EVENTS_BACKLOG = 1
+        since = UserEvent.objects.latest("pk").pk
+        make_user("user@app.com")
+        make_user("other@app.com")
+
+        @async_to_sync
+        async def run():
+            communicator = self.connect(admin, f"&since={since}")
+            await communicator.connect()
+            message = await communicator.receive_json_from()
+
+            await communicator.disconnect()
+            return message
+
+        assert run() == {"type": "reset"}
+
+    def test_prune_user_events(self, admin):
+        count = UserEvent.objects.update(created_at="2000-01-01T00:00:00Z")
+        out = StringIO()
+
+        call_command("prune_user_events", stdout=out)
+
+        assert not UserEvent.objects.exists()
+        assert f"Pruned {count} events" in out.getvalue()
+
+
+@pytest.mark.django_db
+class TestUserEventsLog:
+    """Test which user changes are logged"""
+
+    def test_password_and_login_saves_are_not_logged(self):
+        user = make_user("user@app.com")
+        count = UserEvent.objects.count()
+
+        user.set_password("changed")
+        user.save(update_fields=["password"])
+        user.save(update_fields=["last_login"])
+        unchanged = UserEvent.objects.count()
+        user.save(update_fields=["first_name"])
+
+        assert unchanged == count
+        assert UserEvent.objects.count() == count + 1
+
+    @pytest.mark.skipif(connection.vendor != "postgresql", reason="PostgreSQL backend")
+    def test_events_are_logged_under_the_sequence_lock(self):
+        with CaptureQueriesContext(connection) as context:
+            make_user("user@app.com")
+
+        sql = [query["sql"] for query in context.captured_queries]
+        lock = next(
+            i for i, query in enumerate(sql) if "pg_advisory_xact_lock" in query
+        )
+        assert 'INSERT INTO "users_userevent"' in sql[lock + 1]